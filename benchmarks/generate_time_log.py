@@ -0,0 +1,65 @@
+"""Generate synthetic time_log.csv files for benchmarking.
+
+Rows use the app's headerless format (date, task, start HH:MM, end HH:MM, minutes) and are written
+in date order, the way the app appends them.
+
+    python benchmarks/generate_time_log.py 10y /tmp/time_log_10y.csv
+"""
+import argparse
+import csv
+import random
+from datetime import datetime, timedelta
+
+# Preset sizes: (days of history, sessions per day range). The 1m preset packs ten years densely
+# enough to reach roughly a million rows.
+PRESETS = {
+    "1y": (365, (0, 8)),
+    "10y": (3650, (0, 8)),
+    "1m": (3650, (250, 298)),
+}
+
+def generate_log(path, days, sessions_per_day=(0, 8), tasks=("Main", "Secondary"), seed=0, end_date=None):
+    """Write `days` days of realistic sessions ending on `end_date` (default today). Returns the row count."""
+    rng = random.Random(seed)
+    end_date = end_date or datetime.now().date()
+    rows = 0
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        for offset in range(days - 1, -1, -1):
+            log_date = end_date - timedelta(days=offset)
+            low, high = sessions_per_day
+            if log_date.weekday() >= 5:
+                high = max(low, high // 2)  # Lighter weekends
+            count = rng.randint(low, high)
+            if count == 0:
+                continue
+
+            # Spread the sessions over the day between 06:00 and 23:59 without overlaps
+            slot = (24 * 60 - 6 * 60) // count
+            for index in range(count):
+                start = 6 * 60 + index * slot + rng.randint(0, max(slot // 4, 0))
+                duration = rng.randint(min(5, slot // 2), max(min(120, slot - 1), 1))
+                end = min(start + duration, 24 * 60 - 1)
+                writer.writerow([
+                    log_date,
+                    tasks[0] if rng.random() < 0.6 else rng.choice(tasks),
+                    f"{start // 60:02d}:{start % 60:02d}",
+                    f"{end // 60:02d}:{end % 60:02d}",
+                    end - start,
+                ])
+                rows += 1
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic multi-year time_log.csv")
+    parser.add_argument("size", choices=sorted(PRESETS), help="Preset size of the log")
+    parser.add_argument("path", help="Where to write the CSV file")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    days, sessions = PRESETS[args.size]
+    rows = generate_log(args.path, days, sessions, seed=args.seed)
+    print(f"Wrote {rows} rows ({days} days) to {args.path}")
+
+if __name__ == "__main__":
+    main()
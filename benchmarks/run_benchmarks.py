@@ -0,0 +1,194 @@
+"""Headless benchmarks for the time log hot paths, reported as JSON.
+
+Generates synthetic logs (see generate_time_log.py), times the store, analytics, delete and import
+paths against each of them, and optionally compares the medians with a saved baseline:
+
+    python benchmarks/run_benchmarks.py --sizes 1y 10y --output results.json
+    python benchmarks/run_benchmarks.py --sizes 10y --baseline results.json --threshold 1.5
+
+The exit code is 1 when any benchmark is slower than `threshold` times its baseline median.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import time_log_core as core
+import time_log_charts as charts
+from generate_time_log import PRESETS, generate_log
+
+# ------------------------------ Timing Helpers ------------------------------ #
+
+def time_call(func, repeat, setup=lambda: None):
+    """Time func(setup()) `repeat` times (setup is not timed) and summarize the samples in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        arg = setup()
+        started = time.perf_counter()
+        func(arg)
+        samples.append((time.perf_counter() - started) * 1000)
+    return {"median_ms": round(statistics.median(samples), 3), "min_ms": round(min(samples), 3), "runs": repeat}
+
+# ------------------------------ Benchmark Suite ------------------------------ #
+
+def run_suite(log_path, repeat, work_dir):
+    """Run every benchmark against one log file and return {name: timing}."""
+    today = datetime.now().date()
+    results = {}
+
+    # Store loading: the first refresh after startup only reads the tail; analytics over all time read everything
+    results["cold_start_today_totals"] = time_call(lambda store: store.day_totals(today), repeat,
+                                                   setup=lambda: core.LogStore(log_path))
+    results["full_load"] = time_call(lambda store: store.load(), repeat, setup=lambda: core.LogStore(log_path))
+    # All-time totals from a fresh store: the first run writes the daily rollup sidecar, later runs reuse it
+    results["cold_start_all_time_totals"] = time_call(
+        lambda store: core.calculate_task_totals(store, "all", "Main"), repeat, setup=lambda: core.LogStore(log_path))
+
+    store = core.LogStore(log_path)
+    store.load()
+
+    for period in ("7days", "30days", "365days", "all"):
+        results[f"calculate_task_totals_{period}"] = time_call(
+            lambda _, period=period: core.calculate_task_totals(store, period, "Main"), repeat)
+    results["calculate_task_totals_all_monthly"] = time_call(
+        lambda _: core.calculate_task_totals(store, "all", "Main", "month"), repeat)
+    results["chart_series_all_downsampled"] = time_call(
+        lambda _: core.calculate_chart_series(store, "all", None, "day", 125), repeat)
+    results["calendar_grid_all"] = time_call(lambda _: core.calculate_calendar_grid(store, "all"), repeat)
+    results["focus_heatmap_all"] = time_call(lambda _: core.calculate_focus_heatmap(store, "all"), repeat)
+    results["report_pages_build"] = time_call(
+        lambda _: charts.build_report_pages(store, [period for period, _ in core.PERIOD_CHOICES], [charts.ALL_TASKS, "Main"]),
+        repeat)
+    results["calculate_average_filling_time"] = time_call(
+        lambda _: core.calculate_average_filling_time(store, "Main"), repeat)
+    results["rolling_stats_build"] = time_call(lambda _: core.RollingStats.from_store(store), repeat)
+    results["update_totals_aggregation"] = time_call(
+        lambda _: (store.day_totals(today), store.rows_for_date(today)), repeat)
+
+    # Delete paths work on a fresh scratch copy each run
+    scratch_path = os.path.join(work_dir, "scratch_time_log.csv")
+
+    def scratch_store():
+        shutil.copyfile(log_path, scratch_path)
+        scratch = core.LogStore(scratch_path)
+        scratch.ensure_loaded()
+        return scratch
+
+    results["delete_last_entry"] = time_call(lambda scratch: scratch.delete_last(), repeat, setup=scratch_store)
+    results["delete_entries_today"] = time_call(lambda scratch: scratch.delete_date(today), repeat, setup=scratch_store)
+    if store.rows:
+        middle_date = store.rows[len(store.rows) // 2][0]  # Not at the tail, so this forces a rewrite
+        results["delete_entries_mid_history"] = time_call(
+            lambda scratch: scratch.delete_date(middle_date), repeat, setup=scratch_store)
+
+    # The streaming import pipeline, fed with the log itself as the "old CSV file"
+    import_path = os.path.join(work_dir, "imported_time_log.csv")
+    results["sequential_import"] = time_call(
+        lambda _: core.import_pipeline(None, log_path, lambda rows: core.write_rows_atomically(import_path, rows),
+                                      lambda message, fraction: None, lambda: False),
+        max(1, repeat // 2))
+    # Merging the log into a copy of itself: one hash lookup per row and nothing written
+    merge_path = os.path.join(work_dir, "merged_time_log.csv")
+
+    def merge_store():
+        shutil.copyfile(log_path, merge_path)
+        return core.LogStore(merge_path)
+
+    results["merge_import_rerun"] = time_call(
+        lambda merge: core.merge_import(merge, None, log_path, lambda message, fraction: None, lambda: False),
+        max(1, repeat // 2), setup=merge_store)
+    return results
+
+def run_edge_cases(repeat, work_dir):
+    """Time the startup paths on logs with no recent rows; these used to fail rather than be slow."""
+    today = datetime.now().date()
+    logs = {"empty": os.path.join(work_dir, "empty_time_log.csv"), "missing": os.path.join(work_dir, "missing_time_log.csv"),
+            "stale": os.path.join(work_dir, "stale_time_log.csv")}
+    open(logs["empty"], 'w').close()
+    generate_log(logs["stale"], 60, end_date=today - timedelta(days=45))  # Nothing in the tail window
+
+    results = {}
+    for name, log_path in logs.items():
+        results[f"{name}_focus_target"] = time_call(
+            lambda store: core.calculate_average_filling_time(store, "Main"), repeat, setup=lambda: core.LogStore(log_path))
+        results[f"{name}_rolling_stats"] = time_call(
+            lambda store: core.get_rolling_stats(store), repeat, setup=lambda: core.LogStore(log_path))
+        results[f"{name}_report_pages_build"] = time_call(
+            lambda store: charts.build_report_pages(store, ["7days", "all"], [charts.ALL_TASKS, "Main"]), repeat,
+            setup=lambda: core.LogStore(log_path))
+    return results
+
+def find_regressions(results, baseline, threshold, min_delta_ms):
+    """List benchmarks whose median grew past threshold x baseline (and by more than min_delta_ms)."""
+    regressions = []
+    for size, benchmarks in results["sizes"].items():
+        for name, timing in benchmarks.items():
+            if name == "rows":
+                continue
+            previous = baseline.get("sizes", {}).get(size, {}).get(name)
+            if not previous:
+                continue
+            current_ms, previous_ms = timing["median_ms"], previous["median_ms"]
+            if current_ms > previous_ms * threshold and current_ms - previous_ms > min_delta_ms:
+                regressions.append(f"{size}/{name}: {previous_ms:.1f} ms -> {current_ms:.1f} ms")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the time log app headlessly")
+    parser.add_argument("--sizes", nargs="+", choices=sorted(PRESETS), default=["1y", "10y"])
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark")
+    parser.add_argument("--work-dir", help="Directory for generated logs (reused between runs when given)")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=1.5, help="Allowed slowdown factor versus the baseline")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    # The core imports numpy and pandas lazily; load them now so the first benchmark is not charged for it
+    import numpy, pandas  # noqa: F401
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="time_log_bench_")
+    os.makedirs(work_dir, exist_ok=True)
+
+    results = {"python": platform.python_version(), "date": datetime.now().isoformat(timespec="seconds"), "sizes": {}}
+    for size in args.sizes:
+        log_path = os.path.join(work_dir, f"time_log_{size}.csv")
+        if not os.path.exists(log_path):
+            days, sessions = PRESETS[size]
+            generate_log(log_path, days, sessions)
+        print(f"Benchmarking {size} ({log_path})...", file=sys.stderr)
+        results["sizes"][size] = {"rows": core.count_lines(log_path), **run_suite(log_path, args.repeat, work_dir)}
+    print("Benchmarking logs without recent rows...", file=sys.stderr)
+    results["sizes"]["edge"] = {"rows": 0, **run_edge_cases(args.repeat, work_dir)}
+
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(report + "\n")
+    else:
+        print(report)
+
+    if not args.work_dir:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = find_regressions(results, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print("Performance regressions:\n  " + "\n  ".join(regressions), file=sys.stderr)
+            sys.exit(1)
+        print("No regressions against the baseline.", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
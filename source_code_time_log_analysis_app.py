@@ -1,82 +1,123 @@
 import tkinter as tk
 from tkinter import messagebox, ttk, simpledialog, filedialog
-from datetime import datetime, timedelta
-import csv
-import os
-import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import numpy as np
+from datetime import date, datetime, timedelta
+import math
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import ttk
 from tkinter import font
 
+# Logging and analytics live in the headless core; matplotlib is only imported when the chart is first drawn
+from time_log_core import (
+    log_file, db_file, SQLiteLogStore, ImportCancelled, open_log_store,
+    migrate_csv_to_sqlite, export_sqlite_to_csv, import_pipeline, merge_import, log_task, calculate_average_filling_time,
+    calculate_chart_series, calculate_calendar_grid, calculate_focus_heatmap, calculate_team_totals, PERIOD_CHOICES, GROUP_CHOICES,
+    instrumented, add_rows_scanned, hot_path_report, export_hot_path_report, reset_hot_path_stats,
+    start_profile_capture, stop_profile_capture,
+    load_task_categories, save_task_categories, merge_task_categories,
+    get_rolling_stats, load_focus_target, save_focus_target, FOCUS_STATISTICS,
+)
+from time_log_charts import (
+    ALL_TASKS, max_date_labels, format_duration_for_chart, format_time_axis, format_date_axis, BarChart,
+)
+
 # Global variables
 current_task = None
 start_time = None
-log_file = "time_log.csv"
 circle_fill_time = 0
 circle_filled = 0
+circle_ticker = None  # after() id of the shared progress-circle ticker, None while idle
+progress_circles = {}  # canvas -> its oval/arc item ids and last drawn fill, for the main and floating circles
 chart_canvas = None
-
-# ------------------------------ CSV File Management ------------------------------ #
-
-def ensure_csv_file():
-    """Ensure the CSV file exists and has the correct header."""
-    if not os.path.exists(log_file):
-        with open(log_file, 'w', newline='') as file:
-            writer = csv.writer(file)
-           
-
-def read_csv_lines():
-    """Read lines from the CSV file."""
-    if os.path.exists(log_file):
-        with open(log_file, 'r') as file:
-            return file.readlines()
-    return []
-
-# ------------------------------ Logging Functions ------------------------------ #
-
-def log_task(task, start_time, end_time):
-    """Log task details into the CSV file."""
-    duration = round((end_time - start_time).total_seconds() / 60)
-    with open(log_file, 'a', newline='') as file:
-        writer = csv.writer(file)
-        writer.writerow([datetime.now().date(), task, start_time.strftime("%H:%M"), end_time.strftime("%H:%M"), duration])
-
-def calculate_average_filling_time(task):
-    """Calculate the average filling time for a task over the last 7 days."""
-    today = datetime.now().date()
-    dates = [(today - timedelta(days=i)) for i in range(7)]
-    total_duration = 0
-    date_log = {date: 0 for date in dates}
-    
-    lines = read_csv_lines()
-    for row in lines[1:]:  # Skip header line
-        log_date, logged_task, _, _, duration = row.strip().split(',')
-        log_date = datetime.strptime(log_date, "%Y-%m-%d").date()
-        if log_date in dates and logged_task == task:
-            date_log[log_date] += float(duration)
-
-    total_duration = sum(date_log.values())
-    average = total_duration / 7
-    return average + 10
+chart_fig = chart_ax = None
+chart_bar_chart = None  # BarChart holding the long-lived bars, average and trend lines
+chart_heatmap = None  # AxesImage of the calendar view, hidden while the bars are shown
+chart_series_cache = {}  # (period, task, group, max bars, today, window) -> series, see get_chart_series
+chart_bar_pixels = 8  # Narrowest bar (in screen pixels) before the chart is downsampled to coarser buckets
+focus_bin_minutes = 60  # Time bins of the Focus Hours view: 60 gives 7 x 24 cells, 15 gives 7 x 96
+chart_cache_owner = None  # (store id, store version) the cached series were computed from
+chart_request = None  # Future of the newest chart computation; older ones are cancelled
+chart_generation = 0  # Bumped per chart request so results of superseded requests are dropped
+chart_dirty = True  # The chart is out of date and is redrawn the next time the Analysis tab is shown
+log_poll_ms = 5000  # How often the log is checked for changes made by other writers
+history_page_size = 100  # Rows inserted into the History table at a time
+history_cursors = [None]  # Cursor of every page visited so far in the History tab; the last one is showing
+history_next_cursor = None  # Where the next History page starts, None on the last page
+history_loaded = False  # The History tab fetches its first page lazily, when first shown
+team_directory = None  # Folder of team members' CSV logs shown in the Team tab
+team_series = {}  # "Team (combined)" and each person -> (dates, totals) from the last aggregation
+team_series_settings = (None, "day")  # (task, group) the team series were aggregated for
+team_chart_fig = team_chart_ax = team_chart_canvas = None
+api_server = None  # ApiServerThread while the local JSON API is switched on in the Settings tab
+TEAM_LABEL = "Team (combined)"
+# Loaded and opened at startup in the __main__ block, not at import: spawned Team workers re-run
+# this script as __mp_main__ and must not open the log or start threads
+task_categories = []  # Offered in every task selector; tasks found in the log are added
+focus_target = None  # Window, statistic and increment of the filling time formula
+log_store = None  # Swapped for an SQLiteLogStore by migrate_to_sqlite
+
+# ------------------------------ Background Worker ------------------------------ #
+
+# A single worker thread runs every store access and aggregation, so the log is never touched
+# by two threads at once and the Tk thread never waits on disk.
+io_executor = None  # ThreadPoolExecutor with one thread, started in the __main__ block
+background_results = queue.Queue()  # Finished futures waiting to be delivered on the Tk thread
+# Team aggregation never touches this user's log, so it gets its own thread and does not hold up the refreshes
+team_executor = None
+
+def run_in_background(job, on_done=None, on_error=None, executor=None):
+    """Run job() on the worker thread; on_done(result) or on_error(exception) is later called on the Tk thread."""
+    future = (executor or io_executor).submit(job)
+    future.add_done_callback(lambda done: background_results.put((done, on_done, on_error)))
+    return future
+
+def report_background_error(error):
+    messagebox.showerror("Error", f"A background task failed: {error}")
+
+def drain_background_results():
+    """Deliver finished background jobs to their callbacks; reschedules itself on the Tk main loop."""
+    while True:
+        try:
+            future, on_done, on_error = background_results.get_nowait()
+        except queue.Empty:
+            break
+        if future.cancelled():
+            continue
+        error = future.exception()
+        if error is not None:
+            (on_error or report_background_error)(error)
+        elif on_done is not None:
+            on_done(future.result())
+    root.after(50, drain_background_results)
 
 # ------------------------------ Task Management Functions ------------------------------ #
 
 def start_task():
     """Start tracking a task and log the circle filling times."""
     global current_task, start_time, circle_fill_time
-    if task_var.get() in ["Main", "Secondary"]:
-        current_task = task_var.get()
+    if task_var.get().strip():
+        current_task = task_var.get().strip()
         start_time = datetime.now()
-        circle_fill_time = calculate_average_filling_time(current_task)
-        
-        label_fill_time.config(text=f"Filling Time: {format_duration(circle_fill_time)}")
+        circle_fill_time = 0  # Filled in once the background average is ready
+
+        label_fill_time.config(text="Filling Time: calculating...")
         start_button.config(state="disabled")
         stop_button.config(state="normal")
-        
-        # Enable the floating circle button once the task starts
-        floating_circle_button.config(state="normal")
+
+        task = current_task
+        def fill_time_ready(fill_time):
+            global circle_fill_time
+            if current_task != task or start_time is None:
+                return  # The task was stopped before the average arrived
+            circle_fill_time = fill_time
+            label_fill_time.config(text=f"Filling Time: {format_duration(circle_fill_time)}")
+            # Enable the floating circle button once the fill time is known
+            floating_circle_button.config(state="normal")
+
+        target = dict(focus_target)
+        run_in_background(lambda: calculate_average_filling_time(log_store, task, target), on_done=fill_time_ready)
+        start_circle_ticker()
 
 
 def stop_task():
@@ -85,7 +126,8 @@ def stop_task():
 
     if current_task and start_time:
         end_time = datetime.now()
-        log_task(current_task, start_time, end_time)
+        task, task_start = current_task, start_time
+        run_in_background(lambda: log_task(log_store, task, task_start, end_time))  # Queued ahead of the refreshes below
 
         reset_task_variables()
         update_totals()
@@ -115,11 +157,11 @@ def reset_task_variables():
     floating_circle_button.config(state="normal")
 
 def reset_circle():
-    """Reset the circle to its original unfilled state."""
+    """Reset the circle to its original unfilled state and stop the ticker."""
     global circle_filled
     circle_filled = 0
-    canvas.delete("circle")
-    canvas.create_oval(50, 50, 150, 150, outline="black", width=2, fill="white")
+    stop_circle_ticker()
+    draw_progress_circle(canvas, 0, force=True)
 
 def format_duration(total_minutes):
     """Format the duration from minutes to hours and minutes."""
@@ -129,51 +171,102 @@ def format_duration(total_minutes):
 
 # ------------------------------ Circle Update Functions ------------------------------ #
 
+def create_progress_circle(target_canvas, x0, y0, x1, y1):
+    """Create a circle's oval and arc items once; later updates only reconfigure them."""
+    oval = target_canvas.create_oval(x0, y0, x1, y1, outline="black", width=2, fill="white")
+    arc = target_canvas.create_arc(x0, y0, x1, y1, start=90, extent=0, fill="blue", state="hidden")
+    progress_circles[target_canvas] = {"oval": oval, "arc": arc, "radius": (x1 - x0) / 2, "filled": None}
+
+def draw_progress_circle(target_canvas, filled, force=False):
+    """Show `filled` (0 to 1) on a progress circle, skipping changes that would move the arc by less than a pixel."""
+    circle = progress_circles[target_canvas]
+    previous = circle["filled"]
+    if not force and previous is not None and (filled >= 1.0) == (previous >= 1.0):
+        if abs(filled - previous) * 2 * math.pi * circle["radius"] < 1:
+            return
+    circle["filled"] = filled
+    if filled >= 1.0:
+        target_canvas.itemconfig(circle["oval"], fill="blue")
+        target_canvas.itemconfig(circle["arc"], state="hidden")
+    else:
+        target_canvas.itemconfig(circle["oval"], fill="white")
+        target_canvas.itemconfig(circle["arc"], extent=-360 * filled, state="normal" if filled > 0 else "hidden")
+
+def current_fill_fraction():
+    """Return how much of the focus target has elapsed for the running task (0 to 1)."""
+    if not (current_task and start_time and circle_fill_time):
+        return 0.0
+    elapsed_time = (datetime.now() - start_time).total_seconds() / 60
+    return min(elapsed_time / circle_fill_time, 1.0)
+
 def update_circle():
-    """Update the circle to reflect the elapsed time."""
-    if current_task:
-        elapsed_time = (datetime.now() - start_time).total_seconds() / 60
-        circle_filled = min(elapsed_time / circle_fill_time, 1.0)
-        canvas.delete("circle")
-        canvas.create_oval(50, 50, 150, 150, outline="black", width=2, fill="white")
-        if circle_filled < 1.0:
-            canvas.create_arc(50, 50, 150, 150, start=90, extent=-360 * circle_filled, fill="blue", tags="circle")
-        else:
-            canvas.create_oval(50, 50, 150, 150, outline="black", width=2, fill="blue", tags="circle")
-    root.after(1000, update_circle)  # Update every second
+    """Shared ticker: update the main and floating circles once a second while a task is running."""
+    global circle_ticker
+    if not current_task:
+        circle_ticker = None  # Idle: stop ticking until the next task starts
+        return
+    filled = current_fill_fraction()
+    for target_canvas in list(progress_circles):
+        draw_progress_circle(target_canvas, filled)
+    circle_ticker = root.after(1000, update_circle)  # Update every second
+
+def start_circle_ticker():
+    if circle_ticker is None:
+        update_circle()
+
+def stop_circle_ticker():
+    global circle_ticker
+    if circle_ticker is not None:
+        root.after_cancel(circle_ticker)
+        circle_ticker = None
 
 # ------------------------------ Totals and Entries Functions ------------------------------ #
 
 def update_totals():
-    """Calculate and display totals for each task."""
-    total_main = total_secondary = 0
+    """Calculate (in the background) and display totals for each task."""
     today = datetime.now().date()
-    lines = read_csv_lines()
 
-    for row in lines[1:]:
-        log_date, task, _, _, duration = row.strip().split(',')
-        if datetime.strptime(log_date, "%Y-%m-%d").date() == today:
-            if task == "Main":
-                total_main += float(duration)
-            elif task == "Secondary":
-                total_secondary += float(duration)
+    def show_totals(totals):
+        lines = [f"{task} Total: {format_duration(totals[task])}"
+                 for task in merge_task_categories(task_categories, totals) if totals.get(task)]
+        label_totals.config(text="\n".join(lines) or "No time logged today")
 
-    label_main_total.config(text=f"Main Task Total: {format_duration(total_main)}")
-    label_secondary_total.config(text=f"Secondary Task Total: {format_duration(total_secondary)}")
+    @instrumented("update_totals")
+    def load_totals():
+        return log_store.day_totals(today)
+
+    run_in_background(load_totals, on_done=show_totals)
 
 def show_entries_for_today():
-    """Display today's entries in a table format."""
+    """Display today's entries in a table format, once the background query returns them."""
     today = datetime.now().date()
-    for item in tree.get_children():
-        tree.delete(item)
-
-    lines = read_csv_lines()
-    for index, row in enumerate(lines):
-        log_date, task, start, end, duration = row.strip().split(',')
-        if datetime.strptime(log_date, "%Y-%m-%d").date() == today:
-            formatted_date = datetime.strptime(log_date, "%Y-%m-%d").strftime("%d-%b-%y")
+
+    def fill_table(rows):
+        for item in tree.get_children():
+            tree.delete(item)
+        formatted_date = today.strftime("%d-%b-%y")
+        for index, (_, task, start, end, duration) in enumerate(rows):
             tree.insert("", tk.END, values=(formatted_date, task, start, end, f"{duration} mins"), tags=('evenrow' if index % 2 == 0 else 'oddrow',))
 
+    @instrumented("show_entries_for_today")
+    def load_entries():
+        rows = log_store.rows_for_date(today)
+        add_rows_scanned(len(rows))
+        return rows
+
+    run_in_background(load_entries, on_done=fill_table)
+
+def poll_log_changes():
+    """Refresh the views when another instance or a sync tool changed the log; an os.stat per poll otherwise."""
+    def changed(was_changed):
+        if was_changed:
+            update_totals()
+            show_entries_for_today()
+            update_chart()
+
+    run_in_background(log_store.sync, on_done=changed)
+    root.after(log_poll_ms, poll_log_changes)
+
 
 # ------------------------------ Deletion Functions ------------------------------ #
 
@@ -203,61 +296,81 @@ def delete_entries_today():
     confirmation = custom_confirm_dialog("Type 'reset' to delete all entries for today.")
     
     if confirmation == "reset":
+        def deleted(_):
+            show_entries_for_today()
+            update_totals()
+            update_chart()
+            messagebox.showinfo("Success", "Today's entries have been deleted.")
+
         today = datetime.now().date()
-        lines = read_csv_lines()
-
-        with open(log_file, 'w', newline='') as file:
-            writer = csv.writer(file)
-            for line in lines[1:]:  # Skip header line
-                log_date, task, start, end, duration = line.strip().split(',')
-                if datetime.strptime(log_date, "%Y-%m-%d").date() != today:
-                    writer.writerow([log_date, task, start, end, duration])
-        
-        show_entries_for_today()
-        update_totals()
-        update_chart()
-        messagebox.showinfo("Success", "Today's entries have been deleted.")
+        run_in_background(lambda: log_store.delete_date(today), on_done=deleted)
 
 def delete_all_entries():
     """Delete all entries from the CSV file."""
     confirmation = custom_confirm_dialog("Type 'reset' to delete all entries.")
     
     if confirmation == "reset":
-        if os.path.exists(log_file):
-            os.remove(log_file)
-        ensure_csv_file()
-        show_entries_for_today()
-        update_totals()
-        update_chart()
-        messagebox.showinfo("Success", "All entries have been deleted.")
+        def deleted(_):
+            show_entries_for_today()
+            update_totals()
+            update_chart()
+            messagebox.showinfo("Success", "All entries have been deleted.")
+
+        run_in_background(lambda: log_store.clear(), on_done=deleted)
 
 def delete_last_entry():
     """Delete the last entry from the CSV file."""
     confirmation = custom_confirm_dialog("Type 'reset' to delete the last entry.")
     
     if confirmation == "reset":
-        lines = read_csv_lines()
-        
-        if len(lines) <= 1:  # Only header or no entries
-            os.remove(log_file)
-            ensure_csv_file()
+        def deleted(_):
             show_entries_for_today()
             update_totals()
             update_chart()
             messagebox.showinfo("Success", "The last entry has been deleted.")
-            return
 
-        with open(log_file, 'w', newline='') as file:
-            writer = csv.writer(file)
-            for line in lines[:-1]:  # Exclude the last entry
-                writer.writerow(line.strip().split(','))
-        
-        show_entries_for_today()
+        run_in_background(lambda: log_store.delete_last(), on_done=deleted)
+
+# ------------------------------ Import and Export Functions ------------------------------ #
+
+def migrate_to_sqlite():
+    """Move the CSV log into the SQLite backend and switch the app over to it."""
+    if isinstance(log_store, SQLiteLogStore):
+        messagebox.showinfo("Info", f"The log is already stored in '{db_file}'.")
+        return
+    if not messagebox.askyesno("Migrate to SQLite", f"Copy '{log_file}' into '{db_file}' and use it from now on?"):
+        return
+
+    def migrate():
+        global log_store
+        # Swapped on the worker thread, so every job queued after this one uses the new store
+        log_store, count = migrate_csv_to_sqlite(log_file, db_file)
+        return count
+
+    def migrated(count):
         update_totals()
+        show_entries_for_today()
         update_chart()
-        messagebox.showinfo("Success", "The last entry has been deleted.")
+        messagebox.showinfo("Success", f"{count} entries migrated to '{db_file}'.")
 
-# ------------------------------ Import and Export Functions ------------------------------ #
+    run_in_background(migrate, on_done=migrated,
+                      on_error=lambda e: messagebox.showerror("Error", f"Failed to migrate the log: {e}"))
+
+def export_to_csv():
+    """Export the SQLite log to a CSV file in the original format."""
+    if not isinstance(log_store, SQLiteLogStore):
+        messagebox.showinfo("Info", f"The log is already stored as CSV in '{log_file}'.")
+        return
+    file_path = filedialog.asksaveasfilename(
+        defaultextension=".csv",
+        filetypes=[("CSV files", "*.csv")],
+        initialfile=log_file,
+        title="Export the log to CSV"
+    )
+    if file_path:
+        run_in_background(lambda: export_sqlite_to_csv(log_store, file_path),
+                          on_done=lambda count: messagebox.showinfo("Success", f"{count} entries exported to '{file_path}'."),
+                          on_error=lambda e: messagebox.showerror("Error", f"Failed to export the log: {e}"))
 
 def sequential_import():
     """Import old Excel and CSV files, combine the data, and export to a new CSV file."""
@@ -266,67 +379,103 @@ def sequential_import():
         "You can proceed with just the old Excel file if the old CSV file is not available or is empty."
     )
     
-    # Step 1: Import old Excel file
-    file_path = filedialog.askopenfilename(
+    # Step 1: Select old Excel file
+    excel_path = filedialog.askopenfilename(
         filetypes=[("Excel files", "*.xlsx;*.xls")],
         title="Select the old Excel file"
     )
-    if file_path:
-        try:
-            excel_data = pd.read_excel(file_path, header=None)
-            messagebox.showinfo("Success", "Old Excel file imported successfully!")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to import Excel file: {e}")
-            return
-    else:
+    if not excel_path:
         messagebox.showwarning("Warning", "No Excel file selected. Process aborted.")
         return
     
-    # Step 2: Import old CSV file (optional)
+    # Step 2: Select old CSV file (optional)
+    csv_path = None
     import_csv = messagebox.askyesno("Optional CSV Import", "Do you want to import an old CSV file as well?")
     
     if import_csv:
-        file_path = filedialog.askopenfilename(
+        csv_path = filedialog.askopenfilename(
             filetypes=[("CSV files", "*.csv")],
             title="Select the old CSV file"
         )
-        if file_path:
-            try:
-                csv_data = pd.read_csv(file_path, header=None)
-                if csv_data.empty:
-                    messagebox.showinfo("Info", "The CSV file is empty. Proceeding with Excel data only.")
-                    csv_data = None
-                else:
-                    messagebox.showinfo("Success", "Old CSV file imported successfully!")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to import CSV file: {e}")
-                return
-        else:
+        if not csv_path:
             messagebox.showwarning("Warning", "No CSV file selected. Continuing with Excel data only.")
-            csv_data = None
-    else:
-        csv_data = None
+            csv_path = None
     
-    # Process and export new CSV file
-    try:
-        combined_data = pd.concat([excel_data, csv_data], ignore_index=True) if csv_data is not None else excel_data.copy()
-        
-        combined_data.dropna(subset=[0], inplace=True)
-        combined_data[0] = pd.to_datetime(combined_data[0], errors='coerce')
-        combined_data = combined_data.dropna(subset=[0])
-        combined_data.sort_values(by=0, inplace=True)
-        combined_data[2] = combined_data[2].astype(str).str.extract(r'(\d{2}:\d{2})')[0]
-        combined_data[3] = combined_data[3].astype(str).str.extract(r'(\d{2}:\d{2})')[0]
-
-        combined_data.to_csv(log_file, index=False, header=False)
-        messagebox.showinfo("Success", f"New CSV file '{log_file}' generated successfully!")
-        
-        update_totals()
-        show_entries_for_today()
-        update_chart()
+    # Step 3: Merge into the current log (re-imports add nothing) or replace it
+    merge = messagebox.askyesno(
+        "Import Mode",
+        "Merge the imported rows into the current log?\n\n"
+        "Yes keeps every logged session and adds only rows that are not in the log yet.\n"
+        "No replaces the log with the imported data."
+    )
+
+    # Process and export new log in the background
+    start_import_job(excel_path, csv_path, merge)
 
-    except Exception as e:
-        messagebox.showerror("Error", f"Failed to process and export CSV file: {e}")
+def start_import_job(excel_path, csv_path, merge=False):
+    """Run import_pipeline (or merge_import) on the background worker, showing its progress with a Cancel button."""
+    dialog = tk.Toplevel(root)
+    dialog.title("Importing")
+    dialog.geometry("400x160")
+    dialog.transient(root)
+
+    status_label = tk.Label(dialog, text="Reading files...", font=("Helvetica", 12))
+    status_label.pack(pady=10)
+    progress_bar = ttk.Progressbar(dialog, length=300, maximum=1.0)
+    progress_bar.pack(pady=10)
+
+    cancel_event = threading.Event()
+    cancel_button = tk.Button(dialog, text="Cancel", command=cancel_event.set, font=("Helvetica", 12), width=10)
+    cancel_button.pack(pady=10)
+    dialog.protocol("WM_DELETE_WINDOW", cancel_event.set)
+
+    messages = queue.Queue()
+
+    def work():
+        try:
+            progress = lambda message, fraction: messages.put(("progress", message, fraction))
+            # Runs on the worker thread, which owns log_store, so the store writes the imported rows itself
+            if merge:
+                added, skipped = merge_import(log_store, excel_path, csv_path, progress, cancel_event.is_set)
+                messages.put(("merged", added, skipped))
+                return
+            count = import_pipeline(excel_path, csv_path, log_store.replace_all, progress, cancel_event.is_set)
+            messages.put(("done", count))
+        except ImportCancelled:
+            messages.put(("cancelled",))
+        except Exception as e:
+            messages.put(("error", e))
+
+    def poll_import_progress():
+        """Drain worker messages on the Tk thread; reschedule until the worker finishes."""
+        while True:
+            try:
+                message = messages.get_nowait()
+            except queue.Empty:
+                dialog.after(100, poll_import_progress)
+                return
+            if message[0] == "progress":
+                status_label.config(text=message[1])
+                progress_bar['value'] = message[2]
+                continue
+            dialog.destroy()
+            if message[0] in ("done", "merged"):
+                load_logged_tasks()
+                update_totals()
+                show_entries_for_today()
+                update_chart()
+                if message[0] == "merged":
+                    messagebox.showinfo("Success", f"Added {message[1]} new entries to '{log_store.path}' ({message[2]} were already logged).")
+                else:
+                    messagebox.showinfo("Success", f"Time log '{log_store.path}' generated with {message[1]} entries!")
+            elif message[0] == "cancelled":
+                messagebox.showinfo("Cancelled", "Import cancelled. The existing log was left unchanged.")
+            else:
+                messagebox.showerror("Error", f"Failed to process and export CSV file: {message[1]}")
+            return
+
+    run_in_background(work)
+    poll_import_progress()
 
 
 
@@ -344,112 +493,451 @@ def format_duration(minutes):
     return f"{hours}h {minutes}m"
 
 
-def format_duration_for_chart(minutes):
-    """Format duration in minutes to 'hh:mm' for the Y-axis."""
-    hours = int(minutes // 60)
-    remaining_minutes = int(minutes % 60)
-    return f"{hours:02d}:{remaining_minutes:02d}"
-
 # ------------------------------------ Chart/Analysis Functions ------------------------------------
 
-def calculate_task_totals(period, task_type_chart):
-    """Calculate total durations for the selected task ('Main' or 'Secondary') over the specified period."""
+@instrumented("update_chart")  # The worker side of a chart update: cache lookup plus aggregation
+def get_chart_series(period, task_type_chart, group, max_buckets):
+    """Return the chart series, reusing the cached series while the log is unchanged.
+
+    For bars this is (group used, dates, {task: totals}, trend, window stats), with at most `max_buckets`
+    bars; for group 'calendar' it is ('calendar', first Monday, weekday-by-week grid, None, window stats)
+    and for 'hours' ('hours', None, weekday-by-time-bin grid, None, window stats).
+    The trend line and the stats come from the store's rolling stats, which appends keep current without a re-read.
+    """
+    global chart_cache_owner
+    log_store.sync()  # Count changes by other writers before checking the cache
+    owner = (id(log_store), log_store.version)
+    if chart_cache_owner != owner:
+        chart_series_cache.clear()
+        chart_cache_owner = owner
     today = datetime.now().date()
+    window = focus_target["window_days"]
+    key = (period, task_type_chart, group, max_buckets, today, window)
+    if key not in chart_series_cache:
+        tasks = None if task_type_chart == ALL_TASKS else task_type_chart
+        stats = get_rolling_stats(log_store)
+        window_stats = {
+            "mean": stats.window_mean(tasks, today, window),
+            "median": stats.window_statistic(tasks, today, window, "median"),
+            "p90": stats.window_statistic(tasks, today, window, "p90"),
+            "streak": stats.streak(tasks, today),
+        }
+        if group == "calendar":
+            first_monday, grid = calculate_calendar_grid(log_store, period, tasks)
+            chart_series_cache[key] = (group, first_monday, grid, None, window_stats)
+        elif group == "hours":
+            grid = calculate_focus_heatmap(log_store, period, tasks, focus_bin_minutes)
+            chart_series_cache[key] = (group, None, grid, None, window_stats)
+        else:
+            group, dates, task_totals = calculate_chart_series(log_store, period, tasks, group, max_buckets)
+            chart_series_cache[key] = (group, dates, task_totals, stats.bucket_trend(tasks, dates, group), window_stats)
+    return chart_series_cache[key]
 
-    # Determine period days and dates to analyze
-    period_days = {'7days': 7, '14days': 14, '30days': 30}[period]
-    dates = [(today - timedelta(days=i)) for i in range(period_days)]
-
-    task_logs = {"Main": {}, "Secondary": {}}
+def create_chart():
+    """Create the figure, axes and canvas once; update_chart then edits their artists in place."""
+    global chart_fig, chart_ax, chart_canvas, chart_bar_chart
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    from matplotlib.figure import Figure
 
-    # Initialize task_logs for all dates with zero values
-    for date in dates:
-        task_logs["Main"][date] = 0
-        task_logs["Secondary"][date] = 0
+    chart_fig = Figure(figsize=(10, 5))  # Adjust the figure size if needed
+    chart_ax = chart_fig.add_subplot()
+    chart_fig.subplots_adjust(bottom=0.2)  # Leave room for the rotated date labels
 
-    # Read logs from file
-    if os.path.exists(log_file):
-        with open(log_file, 'r') as file:
-            reader = csv.reader(file)
-            for row in reader:
-                log_date, task, start, end, duration = row
-                log_date = datetime.strptime(log_date, "%Y-%m-%d").date()
-                if log_date in dates:
-                    task_logs[task][log_date] += float(duration)  # Sum durations for each day
+    # Bars, average line and trend line, drawn the same way as the batch report's pages
+    chart_bar_chart = BarChart(chart_ax)
 
-    # Extract the data for the selected task
-    selected_task_totals = [task_logs[task_type_chart].get(date, 0) for date in dates]
-    return dates, selected_task_totals
+    # Embed the matplotlib figure in the Tkinter window
+    chart_canvas = FigureCanvasTkAgg(chart_fig, master=analysis_tab)
+    chart_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
 
 def update_chart():
-    """Update the chart based on the selected period and task."""
-    global chart_canvas  # Use the global variable for chart canvas
-    period = period_var.get()  # Get the period from the selected radio button
-    task_type_chart = task_var_chart.get()  # Get the selected task type ('Main' or 'Secondary')
-    
-    dates, totals = calculate_task_totals(period, task_type_chart)  # Calculate total durations
-    
-    # If the chart already exists, clear it instead of creating a new one
-    if chart_canvas is not None:
-        chart_canvas.get_tk_widget().destroy()
-
-    # Create a new chart
-    fig, ax = plt.subplots(figsize=(10, 5))  # Adjust the figure size if needed
+    """Update the chart if the Analysis tab is showing; otherwise only mark it dirty for the next visit."""
+    global chart_dirty
+    if tab_control.select() != str(analysis_tab):
+        chart_dirty = True
+        return
+    chart_dirty = False
+    request_chart()
 
-    # Adjust the width of the bars
-    bar_width = 0.5  # Adjust this value to change the width of the bars
-    x = range(len(dates))
-    ax.bar(x, totals, color='skyblue', width=bar_width)
+def on_tab_changed(event):
+    """Render the chart (or the first History page) lazily, when its tab is shown."""
+    if chart_dirty and tab_control.select() == str(analysis_tab):
+        update_chart()
+    elif not history_loaded and tab_control.select() == str(history_tab):
+        apply_history_filter()
+    elif tab_control.select() == str(settings_tab):
+        refresh_diagnostics()
 
-    # Format the dates for readability (X-Axis)
-    ax.set_xticks(x)
-    ax.set_xticklabels([date.strftime("%d-%b") for date in dates], rotation=45, ha="right")
+def request_chart():
+    """Compute the chart series for the selected period and task on the background worker.
 
-    # Format the time (Y-Axis)
-    max_duration = max(totals) if totals else 0
-    max_minutes = max(int(max_duration // 30 + 1) * 30, 180)  # Ensure the y-axis goes up to at least 3 hours (180 mins)
-    ax.set_yticks([i * 30 for i in range((max_minutes // 30) + 1)])  # Create ticks every 30 minutes
-    ax.set_yticklabels([format_duration_for_chart(i * 30) for i in range((max_minutes // 30) + 1)])
+    A newer request cancels or discards older ones.
+    """
+    global chart_request, chart_generation
+    period = period_var.get()  # Get the period from the selected radio button
+    task_type_chart = task_var_chart.get()  # Get the selected category, or ALL_TASKS to stack them all
+    group = group_var.get()  # Get the bucket size ('day', 'week', 'month' or 'year'), or 'calendar' for the heatmap
+
+    # Downsample to coarser buckets once the bars would get narrower than chart_bar_pixels
+    width = chart_canvas.get_tk_widget().winfo_width() if chart_canvas is not None else 0
+    if width <= 1:  # Not drawn yet: use the figure's own size
+        width = 1000
+    max_buckets = max(int(width * 0.8) // chart_bar_pixels, 7)  # The axes take about 80% of the figure width
+
+    if chart_request is not None:
+        chart_request.cancel()  # Only succeeds while the old request is still queued
+    chart_generation += 1
+    generation = chart_generation
+
+    def series_ready(series):
+        if generation == chart_generation:
+            shown_group, dates, values, trend, window_stats = series
+            if shown_group == "calendar":
+                render_calendar(dates, values, task_type_chart)
+            elif shown_group == "hours":
+                render_focus_hours(values, task_type_chart)
+            else:
+                render_chart(dates, values, task_type_chart, shown_group, trend)
+            show_window_stats(window_stats)
+
+    chart_request = run_in_background(lambda: get_chart_series(period, task_type_chart, group, max_buckets), on_done=series_ready)
+
+@instrumented("render_chart")  # The Tk side of a chart update
+def render_chart(dates, task_totals, task_type_chart, group, trend=None):
+    """Draw computed series ({task: totals}, stacked when there are several) and the trend into the long-lived chart (Tk thread only)."""
+    if chart_canvas is None:
+        create_chart()
+    show_bar_artists(True)
+    chart_bar_chart.update(dates, task_totals, task_type_chart, group, trend, task_categories)
+
+    # Coalesce with any other pending redraw instead of rendering synchronously
+    chart_canvas.draw_idle()
+
+def show_bar_artists(visible):
+    """Switch the chart between the bar view and the calendar heatmap."""
+    chart_bar_chart.set_visible(visible)
+    if chart_heatmap is not None:
+        chart_heatmap.set_visible(not visible)
+
+def show_heatmap(grid):
+    """Show a weekday-by-column grid in the chart's single heatmap image, hiding the bars; returns the axes."""
+    global chart_heatmap
+    from matplotlib import colormaps
+
+    if chart_canvas is None:
+        create_chart()
+    ax = chart_ax
+    extent = (-0.5, grid.shape[1] - 0.5, 6.5, -0.5)
+    if chart_heatmap is None:
+        cmap = colormaps["Greens"].with_extremes(bad="white")  # NaN cells lie outside the period
+        chart_heatmap = ax.imshow(grid, cmap=cmap, aspect='auto', interpolation='nearest', extent=extent)
+    else:
+        chart_heatmap.set_data(grid)
+        chart_heatmap.set_extent(extent)
+    filled = grid[grid == grid]  # Drop the NaN padding
+    chart_heatmap.set_clim(0, max(filled.max() if filled.size else 0, 1))
+    show_bar_artists(False)
+    if ax.get_legend() is not None:
+        ax.get_legend().remove()
+
+    # Weekdays down the side
+    ax.set_ylim(6.5, -0.5)
+    ax.set_yticks(range(7))
+    ax.set_yticklabels(['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'])
+    ax.set_xlim(-0.5, grid.shape[1] - 0.5)
+    return ax
+
+@instrumented("render_chart")
+def render_calendar(first_monday, grid, task_type_chart):
+    """Draw the daily minutes as a GitHub-style calendar (weekday rows, week columns) with a single imshow (Tk thread only)."""
+    ax = show_heatmap(grid)
+    weeks = grid.shape[1]
+
+    # The month of each column where a new month starts
+    columns = [first_monday + timedelta(weeks=week) for week in range(weeks)]
+    month_starts = [week for week in range(weeks) if week == 0 or columns[week].month != columns[week - 1].month]
+    label_step = max(1, math.ceil(len(month_starts) / max_date_labels))
+    month_starts = month_starts[::label_step]
+    ax.set_xticks(month_starts)
+    ax.set_xticklabels([columns[week].strftime("%b-%y") for week in month_starts], rotation=45, ha="right")
+
+    ax.set_xlabel('Week')
+    task_label = 'All Tasks' if task_type_chart == ALL_TASKS else task_type_chart
+    ax.set_title(f'{task_label}: Minutes per Day (darker is more)')
+    chart_canvas.draw_idle()
+
+@instrumented("render_chart")
+def render_focus_hours(grid, task_type_chart):
+    """Draw the minutes per weekday and time of day as a heatmap: when in the week focus happens (Tk thread only)."""
+    ax = show_heatmap(grid)
+    bins_per_hour = grid.shape[1] // 24
+    hours = range(0, 24, 2)
+    ax.set_xticks([hour * bins_per_hour - 0.5 for hour in hours])
+    ax.set_xticklabels([f"{hour:02d}:00" for hour in hours], rotation=45, ha="right")
+
+    ax.set_xlabel('Time of Day')
+    task_label = 'All Tasks' if task_type_chart == ALL_TASKS else task_type_chart
+    ax.set_title(f'{task_label}: Minutes per Weekday and Hour (darker is more)')
+    chart_canvas.draw_idle()
+
+def show_window_stats(window_stats):
+    """Summarize the focus target window of the charted task(s) under the chart controls."""
+    label_chart_stats.config(text=(
+        f"Last {focus_target['window_days']} days - mean {format_duration_for_chart(window_stats['mean'])}, "
+        f"median {format_duration_for_chart(window_stats['median'])}, p90 {format_duration_for_chart(window_stats['p90'])}, "
+        f"streak {window_stats['streak']} day{'s' if window_stats['streak'] != 1 else ''}"
+    ))
+
+# ------------------------------------ Focus Target Functions -----------------------------------
+
+def save_focus_target_settings():
+    """Save the focus target formula from the Settings tab; it applies to the next started task."""
+    try:
+        target = {
+            "window_days": int(focus_window_var.get()),
+            "statistic": focus_statistic_var.get(),
+            "increment": int(focus_increment_var.get()),
+        }
+    except ValueError:
+        messagebox.showerror("Error", "The window and the increment must be whole numbers.")
+        return
+    if target["window_days"] < 1 or target["increment"] < 0:
+        messagebox.showerror("Error", "The window must be at least 1 day and the increment cannot be negative.")
+        return
+    try:
+        save_focus_target(target)
+    except OSError as e:
+        messagebox.showerror("Error", f"Failed to save the focus target: {e}")
+        return
+    focus_target.update(target)
+    update_chart()  # The stats under the chart use the target window
+    messagebox.showinfo("Success", "Focus target saved.")
+
+# ------------------------------------ Task Category Functions -----------------------------------
+
+def refresh_task_choices():
+    """Offer the current categories in every task selector."""
+    task_combo.config(values=task_categories)
+    chart_task_combo.config(values=[ALL_TASKS] + task_categories)
+    history_task_combo.config(values=["All"] + task_categories)
+    team_task_combo.config(values=task_categories)
+
+def add_task_category():
+    """Ask for a new category name, save it and select it."""
+    name = simpledialog.askstring("Add Category", "Name of the new task category:", parent=root)
+    if not name or not name.strip():
+        return
+    name = name.strip()
+    if name not in task_categories:
+        task_categories.append(name)
+        try:
+            save_task_categories(task_categories)
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to save the task categories: {e}")
+        refresh_task_choices()
+    task_var.set(name)
+
+def load_logged_tasks():
+    """Add tasks found in the log (e.g. imported ones) to the categories on offer."""
+    def merge(tasks):
+        merged = merge_task_categories(task_categories, tasks)
+        if merged != task_categories:
+            task_categories[:] = merged
+            refresh_task_choices()
+
+    run_in_background(log_store.task_names, on_done=merge)
+
+# ------------------------------------ Local API Functions -----------------------------------
+
+def toggle_api_server():
+    """Start or stop the local JSON API; it reads the log through the same background worker as the app."""
+    global api_server
+    if api_server_var.get():
+        from time_log_api import ApiServerThread, api_host, api_port  # Loads asyncio, so only once the API is wanted
 
-    # Add horizontal gridlines
+        try:
+            api_server = ApiServerThread(lambda: log_store, io_executor)
+            api_server_check.config(text=f"Serve totals as JSON on http://{api_host}:{api_port}/")
+        except OSError as e:
+            api_server_var.set(False)
+            messagebox.showerror("Error", f"Failed to start the local API: {e}")
+    elif api_server is not None:
+        api_server.stop()
+        api_server = None
+
+# ------------------------------------ Diagnostics Functions -----------------------------------
+
+def refresh_diagnostics():
+    """Show the current hot path stats in the Diagnostics table."""
+    for item in diagnostics_tree.get_children():
+        diagnostics_tree.delete(item)
+    for index, (name, stats) in enumerate(hot_path_report().items()):
+        values = (name, stats["calls"], stats["rows_scanned"], stats["mean_ms"], stats["p50_ms"], stats["p90_ms"], stats["p99_ms"], stats["max_ms"])
+        diagnostics_tree.insert("", tk.END, values=values, tags=('evenrow' if index % 2 == 0 else 'oddrow',))
+
+def reset_diagnostics():
+    reset_hot_path_stats()
+    refresh_diagnostics()
+
+def export_diagnostics():
+    """Save the hot path stats as JSON, e.g. to attach to a performance bug report."""
+    file_path = filedialog.asksaveasfilename(
+        defaultextension=".json",
+        filetypes=[("JSON files", "*.json")],
+        initialfile="time_log_diagnostics.json",
+        title="Export diagnostics"
+    )
+    if file_path:
+        try:
+            export_hot_path_report(file_path)
+            messagebox.showinfo("Success", f"Diagnostics exported to '{file_path}'.")
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to export diagnostics: {e}")
+
+def toggle_profile_capture():
+    """Start cProfile capture, or stop it and save the collected profile."""
+    if profile_capture_var.get():
+        start_profile_capture()
+        return
+    file_path = filedialog.asksaveasfilename(
+        defaultextension=".prof",
+        filetypes=[("cProfile stats", "*.prof")],
+        initialfile="time_log_profile.prof",
+        title="Save the captured profile"
+    )
+    try:
+        if not stop_profile_capture(file_path or None):
+            messagebox.showinfo("Info", "No profile data was captured.")
+        elif file_path:
+            messagebox.showinfo("Success", f"Profile saved to '{file_path}'.")
+    except OSError as e:
+        messagebox.showerror("Error", f"Failed to save the profile: {e}")
+
+# ------------------------------------ History Functions -----------------------------------
+
+def parse_history_date(text, default):
+    """Parse a YYYY-MM-DD filter field; an empty field means no limit."""
+    text = text.strip()
+    return datetime.strptime(text, "%Y-%m-%d").date() if text else default
+
+def load_history_page():
+    """Fetch the page at the top of history_cursors on the background worker and show it."""
+    global history_loaded
+    try:
+        start_date = parse_history_date(history_from_var.get(), date.min)
+        end_date = parse_history_date(history_to_var.get(), date.max)
+    except ValueError:
+        messagebox.showerror("Error", "Dates must be in YYYY-MM-DD format.")
+        return
+    task = history_task_var.get()
+    task = None if task == "All" else task
+    cursor = history_cursors[-1]
+    history_loaded = True
+    run_in_background(lambda: log_store.history_page(start_date, end_date, task, cursor, history_page_size),
+                      on_done=show_history_page)
+
+def show_history_page(page):
+    """Replace the History table with one page of rows; only these rows are ever in the Treeview."""
+    global history_next_cursor
+    rows, history_next_cursor = page
+    for item in history_tree.get_children():
+        history_tree.delete(item)
+    for index, (log_date, task, start, end, duration) in enumerate(rows):
+        history_tree.insert("", tk.END, values=(log_date.strftime("%d-%b-%y"), task, start, end, f"{duration} mins"), tags=('evenrow' if index % 2 == 0 else 'oddrow',))
+    history_tree.yview_moveto(0)
+    history_page_label.config(text=f"Page {len(history_cursors)}" + ("" if rows else " (no entries)"))
+    history_prev_button.config(state="normal" if len(history_cursors) > 1 else "disabled")
+    history_next_button.config(state="normal" if history_next_cursor is not None else "disabled")
+
+def apply_history_filter():
+    """Start browsing from the first page of the filtered range."""
+    history_cursors[:] = [None]
+    load_history_page()
+
+def next_history_page():
+    if history_next_cursor is not None:
+        history_cursors.append(history_next_cursor)
+        load_history_page()
+
+def previous_history_page():
+    if len(history_cursors) > 1:
+        history_cursors.pop()
+        load_history_page()
+
+# ------------------------------------ Team Dashboard Functions -----------------------------------
+
+def choose_team_directory():
+    """Pick the folder holding one time_log CSV per person and aggregate it."""
+    global team_directory
+    directory = filedialog.askdirectory(title="Select the folder of team time logs")
+    if directory:
+        team_directory = directory
+        team_directory_label.config(text=directory)
+        refresh_team_dashboard()
+
+def refresh_team_dashboard():
+    """Aggregate every log in the team folder on a process pool, then chart the selected series."""
+    if not team_directory:
+        messagebox.showinfo("Info", "Select the folder of team time logs first.")
+        return
+    directory = team_directory
+    period = dict((text, value) for value, text in PERIOD_CHOICES)[team_period_var.get()]
+    group = dict((text, value) for value, text in GROUP_CHOICES)[team_group_var.get()]
+    task = team_task_var.get()
+    team_status_label.config(text="Aggregating...")
+
+    def aggregated(result):
+        global team_series_settings
+        per_person, combined = result
+        team_series_settings = (task, group)
+        team_series.clear()
+        team_series[TEAM_LABEL] = combined
+        team_series.update(per_person)
+        team_person_combo.config(values=list(team_series))
+        if team_person_var.get() not in team_series:
+            team_person_var.set(TEAM_LABEL)
+        team_status_label.config(text=f"{len(per_person)} logs aggregated")
+        show_team_chart()
+
+    def failed(error):
+        team_status_label.config(text="")
+        messagebox.showerror("Error", f"Failed to aggregate the team logs: {error}")
+
+    run_in_background(lambda: calculate_team_totals(directory, period, task, group),
+                      on_done=aggregated, on_error=failed, executor=team_executor)
+
+def show_team_chart():
+    """Draw the combined series or one person's series from the last aggregation."""
+    global team_chart_fig, team_chart_ax, team_chart_canvas
+    task_type_chart, group = team_series_settings
+    series = team_series.get(team_person_var.get())
+    if series is None:
+        return
+    if team_chart_canvas is None:
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+
+        team_chart_fig = Figure(figsize=(10, 5))
+        team_chart_ax = team_chart_fig.add_subplot()
+        team_chart_fig.subplots_adjust(bottom=0.2)  # Leave room for the rotated date labels
+        team_chart_canvas = FigureCanvasTkAgg(team_chart_fig, master=team_tab)
+        team_chart_canvas.get_tk_widget().pack(fill='both', expand=True)
+
+    dates, totals = series
+    ax = team_chart_ax
+    ax.clear()
+    ax.bar(range(len(dates)), totals, color='skyblue', width=0.5)
+    format_date_axis(ax, dates, group)
+    format_time_axis(ax, totals)
     ax.yaxis.grid(True)
-
-    # Calculate and plot the average line
-    if totals:
-        average_duration = np.mean(totals)
-        ax.axhline(y=average_duration, color='red', linestyle='--', label=f'Avg: {format_duration_for_chart(average_duration)}')
-        ax.text(x[-1], average_duration + 10, f'Avg: {format_duration_for_chart(average_duration)}', color='red', verticalalignment='bottom')
-
-    ax.set_xlabel('Date')
     ax.set_ylabel('Total Duration (hh:mm)')
-    ax.set_title(f'{task_type_chart} Task Duration Over Selected Period')
-
-    # Embed the matplotlib figure in the Tkinter window
-    chart_canvas = FigureCanvasTkAgg(fig, master=analysis_tab)
-    chart_canvas.draw()
-    chart_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-
-    # Close the figure to avoid memory issues
-    plt.close(fig)
-
-    # Refocus the Tkinter window in case it minimizes
-    root.deiconify()  # Ensure window is restored if minimized
-    root.lift()  # Bring the window to the top
+    ax.set_title(f'{task_type_chart} Task Duration - {team_person_var.get()}')
+    team_chart_canvas.draw_idle()
 
 # ------------------------------------ Floating Circle Functions -----------------------------------
 def open_floating_circle():
     """Open a floating window with a circular progress indicator and disable the floating button."""
-    global floating_window, canvas_floating, floating_circle_filled, floating_task, floating_circle_fill_time, floating_start_time
-
-    # Calculate the time already passed since the main task started
-    elapsed_time_for_main_circle = (datetime.now() - start_time).total_seconds() / 60
-
-    # Calculate the remaining fill time for the floating circle
-    floating_circle_fill_time = max(circle_fill_time - elapsed_time_for_main_circle, 0)
-
-    # Initialize the floating circle filled percentage based on the elapsed time
-    floating_circle_filled = elapsed_time_for_main_circle / circle_fill_time if circle_fill_time > 0 else 0.0
-    floating_task = True  # Status of the floating circle task
+    global floating_window, canvas_floating
 
     # Open the floating window
     floating_window = tk.Toplevel(root)
@@ -460,38 +948,19 @@ def open_floating_circle():
     floating_window.geometry("100x100")
     floating_window.resizable(False, False)
 
-    # Create the floating circle canvas
+    # Create the floating circle canvas; the shared ticker updates it alongside the main circle
     canvas_floating = tk.Canvas(floating_window, width=100, height=100)
     canvas_floating.pack(fill="both", expand=False)
+    create_progress_circle(canvas_floating, 20, 20, 80, 80)
+    draw_progress_circle(canvas_floating, current_fill_fraction(), force=True)
+
+    # Stop updating the floating circle as soon as its window is destroyed
+    floating_canvas = canvas_floating
+    canvas_floating.bind("<Destroy>", lambda event: progress_circles.pop(floating_canvas, None))
 
     # Disable the floating circle button after the window is opened
     floating_circle_button.config(state="disabled")
 
-    def update_floating_circle():
-        """Update the floating circle based on elapsed time."""
-        global floating_circle_filled
-        if floating_task:
-            elapsed_time = (datetime.now() - start_time).total_seconds() / 60  # Minutes passed since task start
-            remaining_time = max(circle_fill_time - elapsed_time, 0)  # Remaining time for floating circle
-            floating_circle_filled = min(elapsed_time / circle_fill_time, 1.0)  # Calculate fill percentage (0 to 1)
-
-            # Clear previous drawings
-            canvas_floating.delete("circle")
-
-            # Draw the unfilled circle
-            canvas_floating.create_oval(20, 20, 80, 80, outline="black", width=2, fill="white")
-
-            # Draw the filled portion of the circle
-            if floating_circle_filled < 1.0:
-                canvas_floating.create_arc(20, 20, 80, 80, start=90, extent=-360 * floating_circle_filled, fill="blue", tags="circle")
-            else:
-                canvas_floating.create_oval(20, 20, 80, 80, outline="black", width=2, fill="blue", tags="circle")
-
-        # Schedule the next update after 1 second
-        floating_window.after(1000, update_floating_circle)
-
-    update_floating_circle()
-
 
     # Create the right-click menu
     right_click_menu = tk.Menu(floating_window, tearoff=0, font=menu_font_style)
@@ -526,9 +995,8 @@ def open_floating_circle():
 def reset_floating_circle():
     """Reset the floating circle to its initial state."""
     global floating_window, canvas_floating
-    if 'canvas_floating' in globals() and canvas_floating and canvas_floating.winfo_exists():
-        canvas_floating.delete("circle")
-        canvas_floating.create_oval(20, 20, 80, 80, outline="black", width=2, fill="white")
+    if 'canvas_floating' in globals() and canvas_floating in progress_circles:
+        draw_progress_circle(canvas_floating, 0, force=True)
 
 def stop_floating_circle():
     """Stop the floating circle and close the floating window."""
@@ -541,204 +1009,321 @@ def stop_floating_circle():
 
 # ------------------------------------ Main application window -----------------------------------
 
-# Define the main application window
-root = tk.Tk()
-root.title("Time Log Application")
-
-# Task Variable
-task_var = tk.StringVar()
-task_var.set("Main")
-
+# The window is only built when the file is run as a script, so importing this module has no side effects
+if __name__ == "__main__":
+    task_categories = load_task_categories()
+    focus_target = load_focus_target()
+    log_store = open_log_store()
+    io_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="time_log_io")
+    team_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="time_log_team")
 
-#---------------------------------------All pages control---------------------------------------
+    # Define the main application window
+    root = tk.Tk()
+    root.title("Time Log Application")
 
-# Define the font style for the rest of the widgets - all click buttons 
-font_style = font.Font(family="Helvetica", size=14)  # Increased font size
+    # Task Variable
+    task_var = tk.StringVar()
+    task_var.set(task_categories[0])
 
-# Create Tabs
-tab_control = ttk.Notebook(root)
-entry_tab = ttk.Frame(tab_control)
-analysis_tab = ttk.Frame(tab_control)
-settings_tab = ttk.Frame(tab_control)
-tab_control.add(entry_tab, text="Entries")
-tab_control.add(analysis_tab, text="Analysis")
-tab_control.add(settings_tab, text="Settings")
-tab_control.pack(expand=1, fill='both')
-
-# ------------------------------------ Page 1 - Font size -----------------------------------
-
-# Define font style for the menu items - floating circle right click
-menu_font_style = font.Font(family="Helvetica", size=12)  # Adjust the size as needed
-
-#--------------------------Page 1 - Radio button selection changes style----------------------
-
-# Function to update radio button styles for Entry Tab
-def update_radio_styles():
-    if task_var.get() == "Main":
-        radio_main.config(fg="blue", font=(None, 12, 'bold'), bg="yellow")
-        radio_secondary.config(fg="black", font=(None, 12), bg="white")
-    else:
-        radio_main.config(fg="black", font=(None, 12), bg="white")
-        radio_secondary.config(fg="blue", font=(None, 12, 'bold'), bg="yellow")
 
+    #---------------------------------------All pages control---------------------------------------
 
-#-----------------------------Page 1 - Radio buttons & labels------------------------------------
+    # Define the font style for the rest of the widgets - all click buttons 
+    font_style = font.Font(family="Helvetica", size=14)  # Increased font size
 
-# Entry Tab Widgets
-tk.Label(entry_tab, text="Select Task:", font=font_style).pack()
+    # Create Tabs
+    tab_control = ttk.Notebook(root)
+    entry_tab = ttk.Frame(tab_control)
+    analysis_tab = ttk.Frame(tab_control)
+    history_tab = ttk.Frame(tab_control)
+    team_tab = ttk.Frame(tab_control)
+    settings_tab = ttk.Frame(tab_control)
+    tab_control.add(entry_tab, text="Entries")
+    tab_control.add(analysis_tab, text="Analysis")
+    tab_control.add(history_tab, text="History")
+    tab_control.add(team_tab, text="Team")
+    tab_control.add(settings_tab, text="Settings")
+    tab_control.pack(expand=1, fill='both')
+    tab_control.bind("<<NotebookTabChanged>>", on_tab_changed)  # The chart is only drawn when its tab is shown
 
-# Create Radio Buttons with labels that change style when selected (Entry Tab)
-radio_main = tk.Radiobutton(entry_tab, text="Main Task", variable=task_var, value="Main", command=lambda: [update_radio_styles(), update_time_period_styles(), update_task_type_styles()], font=font_style)
-radio_secondary = tk.Radiobutton(entry_tab, text="Secondary Task", variable=task_var, value="Secondary", command=lambda: [update_radio_styles(), update_time_period_styles(), update_task_type_styles()], font=font_style)
-radio_main.pack()
-radio_secondary.pack()
+    # ------------------------------------ Page 1 - Font size -----------------------------------
 
-# Call the function once to set the initial styles (Entry Tab)
-update_radio_styles()
+    # Define font style for the menu items - floating circle right click
+    menu_font_style = font.Font(family="Helvetica", size=12)  # Adjust the size as needed
 
-start_button = tk.Button(entry_tab, text="Start Task", command=start_task, font=font_style)
-start_button.pack()
+    #-----------------------------Page 1 - Task category selection & labels------------------------------------
 
-stop_button = tk.Button(entry_tab, text="Stop Task", command=stop_task, state="disabled", font=font_style)
-stop_button.pack()
+    # Entry Tab Widgets
+    tk.Label(entry_tab, text="Select Task:", font=font_style).pack()
 
-label_fill_time = tk.Label(entry_tab, text="Filling Time: 0.00 mins", font=font_style)
-label_fill_time.pack()
+    # Any number of user-defined categories; "Add Category" saves a new one to the categories file
+    task_select_frame = tk.Frame(entry_tab)
+    task_select_frame.pack(pady=5)
+    task_combo = ttk.Combobox(task_select_frame, textvariable=task_var, values=task_categories, state="readonly", width=20, font=font_style)
+    task_combo.pack(side="left", padx=5)
+    tk.Button(task_select_frame, text="Add Category", command=add_task_category, font=font_style).pack(side="left")
 
-canvas = tk.Canvas(entry_tab, width=200, height=200)
-canvas.pack()
+    start_button = tk.Button(entry_tab, text="Start Task", command=start_task, font=font_style)
+    start_button.pack()
 
-floating_circle_button = tk.Button(entry_tab, text="Floating Circle", command=open_floating_circle, state="disabled", font=font_style)
-floating_circle_button.pack(pady=10)
+    stop_button = tk.Button(entry_tab, text="Stop Task", command=stop_task, state="disabled", font=font_style)
+    stop_button.pack()
 
+    label_fill_time = tk.Label(entry_tab, text="Filling Time: 0.00 mins", font=font_style)
+    label_fill_time.pack()
 
-label_main_total = tk.Label(entry_tab, text="Main Task Total: 0.00 hours", font=font_style)
-label_main_total.pack()
+    canvas = tk.Canvas(entry_tab, width=200, height=200)
+    canvas.pack()
+    create_progress_circle(canvas, 50, 50, 150, 150)
 
-label_secondary_total = tk.Label(entry_tab, text="Secondary Task Total: 0.00 hours", font=font_style)
-label_secondary_total.pack()
+    floating_circle_button = tk.Button(entry_tab, text="Floating Circle", command=open_floating_circle, state="disabled", font=font_style)
+    floating_circle_button.pack(pady=10)
 
-#-------------------------Page 1 - Todays log table, font size & table effect------------------
 
-columns = ("Date", "Task", "Start Time", "End Time", "Duration")
-tree = ttk.Treeview(entry_tab, columns=columns, show='headings')
-tree.heading("Date", text="Date")
-tree.heading("Task", text="Task")
-tree.heading("Start Time", text="Start Time")
-tree.heading("End Time", text="End Time")
-tree.heading("Duration", text="Duration")
-tree.pack(fill='both', expand=True)
+    label_totals = tk.Label(entry_tab, text="No time logged today", font=font_style)  # One line per category with time today
+    label_totals.pack()
 
-# Define tags for odd and even rows with different background colors
-tree.tag_configure('oddrow', background="white")
-tree.tag_configure('evenrow', background="#f0f0f0")  # Light gray color
+    #-------------------------Page 1 - Todays log table, font size & table effect------------------
 
+    columns = ("Date", "Task", "Start Time", "End Time", "Duration")
+    tree = ttk.Treeview(entry_tab, columns=columns, show='headings')
+    tree.heading("Date", text="Date")
+    tree.heading("Task", text="Task")
+    tree.heading("Start Time", text="Start Time")
+    tree.heading("End Time", text="End Time")
+    tree.heading("Duration", text="Duration")
+    tree.pack(fill='both', expand=True)
 
-# Define a larger font style for the notebook tabs 
-tab_font_style = font.Font(family="Helvetica", size=16)  # Adjust the size as needed
+    # Define tags for odd and even rows with different background colors
+    tree.tag_configure('oddrow', background="white")
+    tree.tag_configure('evenrow', background="#f0f0f0")  # Light gray color
 
-# Create a Style object
-style = ttk.Style()
-style.configure('TNotebook.Tab', font=tab_font_style)  # Apply the font style to the notebook tabs
 
-# Style for Treeview (add this to increase font size for Treeview rows and headers)
-style.configure("Treeview", font=("Helvetica", 14), rowheight=25)  # Adjust row height and font size
-style.configure("Treeview.Heading", font=("Helvetica", 16, "bold"))
+    # Define a larger font style for the notebook tabs 
+    tab_font_style = font.Font(family="Helvetica", size=16)  # Adjust the size as needed
 
-# Set gridlines for rows and columns using bordercolor and borderwidth
-style.configure("Treeview", 
-                background="white",
-                foreground="black",
-                rowheight=25,  # Adjust row height for better spacing
-                fieldbackground="white",
-                bordercolor="black",  # Set color of the borders (gridlines)
-                borderwidth=1)        # Width of the gridlines
+    # Create a Style object
+    style = ttk.Style()
+    style.configure('TNotebook.Tab', font=tab_font_style)  # Apply the font style to the notebook tabs
 
-# Add border for the headings
-style.configure("Treeview.Heading", bordercolor="black", borderwidth=1, font=("Helvetica", 16, "bold"))
+    # Style for Treeview (add this to increase font size for Treeview rows and headers)
+    style.configure("Treeview", font=("Helvetica", 14), rowheight=25)  # Adjust row height and font size
+    style.configure("Treeview.Heading", font=("Helvetica", 16, "bold"))
+
+    # Set gridlines for rows and columns using bordercolor and borderwidth
+    style.configure("Treeview", 
+                    background="white",
+                    foreground="black",
+                    rowheight=25,  # Adjust row height for better spacing
+                    fieldbackground="white",
+                    bordercolor="black",  # Set color of the borders (gridlines)
+                    borderwidth=1)        # Width of the gridlines
 
-#----------------------Page 2 - Radio button selection changes style----------------------------
+    # Add border for the headings
+    style.configure("Treeview.Heading", bordercolor="black", borderwidth=1, font=("Helvetica", 16, "bold"))
 
-# Function to update radio button styles for Analysis Tab (Time Period Selection)
-def update_time_period_styles():
-    for rb in [radio_7days, radio_14days, radio_30days]:
-        rb.config(fg="black", font=(None, 12), bg="white")  # Reset all styles
-    if period_var.get() == "7days":
-        radio_7days.config(fg="blue", font=(None, 12, 'bold'), bg="yellow")
-    elif period_var.get() == "14days":
-        radio_14days.config(fg="blue", font=(None, 12, 'bold'), bg="yellow")
-    else:  # 30 days
-        radio_30days.config(fg="blue", font=(None, 12, 'bold'), bg="yellow")
+    #----------------------Page 2 - Radio button selection changes style----------------------------
 
-# Function to update radio button styles for Analysis Tab (Task Type Selection)
-def update_task_type_styles():
-    for rb in [radio_main_task, radio_secondary_task]:
-        rb.config(fg="black", font=(None, 12), bg="white")  # Reset all styles
-    if task_var_chart.get() == "Main":
-        radio_main_task.config(fg="blue", font=(None, 12, 'bold'), bg="yellow")
-    else:  # Secondary
-        radio_secondary_task.config(fg="blue", font=(None, 12, 'bold'), bg="yellow")
-
-
-#-----------------------------Page 2 - Analysis seletion buttons----------------------------------
-
-# Analysis Tab Widgets - Column Chart will replace Treeview
-control_frame = tk.Frame(analysis_tab)
-control_frame.pack(fill='x', pady=10)
-
-time_period_frame = tk.Frame(control_frame)
-time_period_frame.pack(side="left", anchor="w")
-
-period_var = tk.StringVar(value="7days")
-radio_7days = tk.Radiobutton(time_period_frame, text="Last 7 Days", variable=period_var, value="7days", command=lambda: [update_time_period_styles(), update_task_type_styles(), update_chart()], font=font_style)
-radio_14days = tk.Radiobutton(time_period_frame, text="Last 14 Days", variable=period_var, value="14days", command=lambda: [update_time_period_styles(), update_task_type_styles(), update_chart()], font=font_style)
-radio_30days = tk.Radiobutton(time_period_frame, text="Last 30 Days", variable=period_var, value="30days", command=lambda: [update_time_period_styles(), update_task_type_styles(), update_chart()], font=font_style)
-
-# Pack time period radio buttons
-radio_7days.pack(anchor="w", pady=5)
-radio_14days.pack(anchor="w", pady=5)
-radio_30days.pack(anchor="w", pady=5)
-
-# Call the function once to set the initial styles (Time Period)
-update_time_period_styles()
-
-# Replace Mean/Median with Task Type Selection
-task_type_frame = tk.Frame(control_frame)
-task_type_frame.pack(side="right", anchor="e")
-
-task_var_chart = tk.StringVar(value="Main")
-radio_main_task = tk.Radiobutton(task_type_frame, text="Main Task", variable=task_var_chart, value="Main", command=lambda: [update_task_type_styles(), update_time_period_styles(), update_chart()], font=font_style)
-radio_secondary_task = tk.Radiobutton(task_type_frame, text="Secondary Task", variable=task_var_chart, value="Secondary", command=lambda: [update_task_type_styles(), update_time_period_styles(), update_chart()], font=font_style)
-
-# Pack task type radio buttons
-radio_main_task.pack(anchor="w", pady=5)
-radio_secondary_task.pack(anchor="w", pady=5)
-
-# Call the function once to set the initial styles (Task Type)
-update_task_type_styles()
-
-#--------------------------------------Page 3 - Buttons--------------------------------------------
-
-# In the Settings Tab section, add the "Delete Last Entry" button
-
-# Settings Tab Widgets
-tk.Button(settings_tab, text="Delete Today's Entries", command=delete_entries_today, font=font_style).pack(pady=10)
-tk.Button(settings_tab, text="Delete All Entries", command=delete_all_entries, font=font_style).pack(pady=10)
-
-# New Button for Deleting the Last Entry
-tk.Button(settings_tab, text="Delete Last Entry", command=delete_last_entry, font=font_style).pack(pady=10)
-
-tk.Button(settings_tab, text="Import and Export Data", command=sequential_import, font=font_style).pack(pady=10)  # Changed from ttk.Button to tk.Button
-
-# -------------------------------- Application Initialization and Main Loop ---------------------------
-
-# Start updating the circle every second
-update_circle()
-
-# Update totals, entries, and analysis on startup
-update_totals()
-show_entries_for_today()
-update_chart()
-
-# Run the application
-root.mainloop()
\ No newline at end of file
+    # Function to update radio button styles for Analysis Tab (Time Period Selection)
+    def update_time_period_styles():
+        for radios, selected in [(period_radios, period_var.get()), (group_radios, group_var.get())]:
+            for value, rb in radios.items():
+                if value == selected:
+                    rb.config(fg="blue", font=(None, 12, 'bold'), bg="yellow")
+                else:
+                    rb.config(fg="black", font=(None, 12), bg="white")  # Reset all styles
+
+
+    #-----------------------------Page 2 - Analysis seletion buttons----------------------------------
+
+    # Analysis Tab Widgets - Column Chart will replace Treeview
+    control_frame = tk.Frame(analysis_tab)
+    control_frame.pack(fill='x', pady=10)
+
+    time_period_frame = tk.Frame(control_frame)
+    time_period_frame.pack(side="left", anchor="w")
+
+    period_var = tk.StringVar(value="7days")
+    period_radios = {}
+    for value, text in PERIOD_CHOICES:
+        period_radios[value] = tk.Radiobutton(time_period_frame, text=text, variable=period_var, value=value, command=lambda: [update_time_period_styles(), update_chart()], font=font_style)
+        period_radios[value].pack(anchor="w", pady=5)  # Pack time period radio buttons
+
+    # Bucket size for the bars: one per day, week, month or year
+    group_frame = tk.Frame(control_frame)
+    group_frame.pack(side="left", anchor="n", padx=40)
+
+    group_var = tk.StringVar(value="day")
+    group_radios = {}
+    for value, text in GROUP_CHOICES:
+        group_radios[value] = tk.Radiobutton(group_frame, text=text, variable=group_var, value=value, command=lambda: [update_time_period_styles(), update_chart()], font=font_style)
+        group_radios[value].pack(anchor="w", pady=5)
+    # Or every day of the period as a calendar heatmap
+    group_radios["calendar"] = tk.Radiobutton(group_frame, text="Calendar", variable=group_var, value="calendar", command=lambda: [update_time_period_styles(), update_chart()], font=font_style)
+    group_radios["calendar"].pack(anchor="w", pady=5)
+    # Or minutes per weekday and hour of day, from the sessions' start and end times
+    group_radios["hours"] = tk.Radiobutton(group_frame, text="Focus Hours", variable=group_var, value="hours", command=lambda: [update_time_period_styles(), update_chart()], font=font_style)
+    group_radios["hours"].pack(anchor="w", pady=5)
+
+    # Call the function once to set the initial styles (Time Period)
+    update_time_period_styles()
+
+    # Replace Mean/Median with Task Type Selection
+    task_type_frame = tk.Frame(control_frame)
+    task_type_frame.pack(side="right", anchor="e")
+
+    # One category, or all of them stacked
+    task_var_chart = tk.StringVar(value=ALL_TASKS)
+    tk.Label(task_type_frame, text="Task:", font=font_style).pack(anchor="w", pady=5)
+    chart_task_combo = ttk.Combobox(task_type_frame, textvariable=task_var_chart, values=[ALL_TASKS] + task_categories, state="readonly", width=18, font=font_style)
+    chart_task_combo.pack(anchor="w", pady=5)
+    chart_task_combo.bind("<<ComboboxSelected>>", lambda event: update_chart())
+
+    # Rolling stats of the charted task(s) over the focus target window
+    label_chart_stats = tk.Label(analysis_tab, text="", font=font_style)
+    label_chart_stats.pack(anchor="w", padx=10)
+
+    #-----------------------------History Tab - Filters, paged table and navigation-------------------------
+
+    history_filter_frame = tk.Frame(history_tab)
+    history_filter_frame.pack(fill='x', pady=10)
+
+    history_from_var = tk.StringVar()
+    history_to_var = tk.StringVar()
+    history_task_var = tk.StringVar(value="All")
+    tk.Label(history_filter_frame, text="From (YYYY-MM-DD):", font=font_style).pack(side="left", padx=5)
+    tk.Entry(history_filter_frame, textvariable=history_from_var, width=12, font=font_style).pack(side="left")
+    tk.Label(history_filter_frame, text="To:", font=font_style).pack(side="left", padx=5)
+    tk.Entry(history_filter_frame, textvariable=history_to_var, width=12, font=font_style).pack(side="left")
+    tk.Label(history_filter_frame, text="Task:", font=font_style).pack(side="left", padx=5)
+    history_task_combo = ttk.Combobox(history_filter_frame, textvariable=history_task_var, values=["All"] + task_categories, state="readonly", width=14)
+    history_task_combo.pack(side="left")
+    tk.Button(history_filter_frame, text="Apply", command=apply_history_filter, font=font_style).pack(side="left", padx=10)
+
+    history_nav_frame = tk.Frame(history_tab)
+    history_nav_frame.pack(side="bottom", fill='x', pady=10)
+    history_prev_button = tk.Button(history_nav_frame, text="< Previous", command=previous_history_page, state="disabled", font=font_style)
+    history_prev_button.pack(side="left", padx=10)
+    history_page_label = tk.Label(history_nav_frame, text="", font=font_style)
+    history_page_label.pack(side="left", expand=True)
+    history_next_button = tk.Button(history_nav_frame, text="Next >", command=next_history_page, state="disabled", font=font_style)
+    history_next_button.pack(side="right", padx=10)
+
+    history_tree = ttk.Treeview(history_tab, columns=columns, show='headings')
+    for column in columns:
+        history_tree.heading(column, text=column)
+    history_scrollbar = ttk.Scrollbar(history_tab, orient="vertical", command=history_tree.yview)
+    history_tree.configure(yscrollcommand=history_scrollbar.set)
+    history_scrollbar.pack(side="right", fill='y')
+    history_tree.pack(fill='both', expand=True)
+    history_tree.tag_configure('oddrow', background="white")
+    history_tree.tag_configure('evenrow', background="#f0f0f0")
+
+    #-----------------------------Team Tab - Folder, selections and chart-------------------------------
+
+    team_folder_frame = tk.Frame(team_tab)
+    team_folder_frame.pack(fill='x', pady=10)
+    tk.Button(team_folder_frame, text="Select Team Folder", command=choose_team_directory, font=font_style).pack(side="left", padx=10)
+    team_directory_label = tk.Label(team_folder_frame, text="No folder selected", font=font_style)
+    team_directory_label.pack(side="left")
+    team_status_label = tk.Label(team_folder_frame, text="", font=font_style)
+    team_status_label.pack(side="right", padx=10)
+
+    team_control_frame = tk.Frame(team_tab)
+    team_control_frame.pack(fill='x')
+    team_period_var = tk.StringVar(value=PERIOD_CHOICES[0][1])
+    team_group_var = tk.StringVar(value=GROUP_CHOICES[0][1])
+    team_task_var = tk.StringVar(value=task_categories[0])
+    team_person_var = tk.StringVar(value=TEAM_LABEL)
+    team_combos = {}
+    for label, variable, values in [("Period:", team_period_var, [text for _, text in PERIOD_CHOICES]),
+                                    ("Group:", team_group_var, [text for _, text in GROUP_CHOICES]),
+                                    ("Task:", team_task_var, task_categories)]:
+        tk.Label(team_control_frame, text=label, font=font_style).pack(side="left", padx=5)
+        combo = ttk.Combobox(team_control_frame, textvariable=variable, values=values, state="readonly", width=14)
+        combo.pack(side="left")
+        combo.bind("<<ComboboxSelected>>", lambda event: refresh_team_dashboard() if team_directory else None)
+        team_combos[label] = combo
+    team_task_combo = team_combos["Task:"]
+    tk.Label(team_control_frame, text="Show:", font=font_style).pack(side="left", padx=5)
+    team_person_combo = ttk.Combobox(team_control_frame, textvariable=team_person_var, values=[TEAM_LABEL], state="readonly", width=18)
+    team_person_combo.pack(side="left")
+    team_person_combo.bind("<<ComboboxSelected>>", lambda event: show_team_chart())
+
+    #--------------------------------------Page 3 - Buttons--------------------------------------------
+
+    # In the Settings Tab section, add the "Delete Last Entry" button
+
+    # Settings Tab Widgets
+    tk.Button(settings_tab, text="Delete Today's Entries", command=delete_entries_today, font=font_style).pack(pady=10)
+    tk.Button(settings_tab, text="Delete All Entries", command=delete_all_entries, font=font_style).pack(pady=10)
+
+    # New Button for Deleting the Last Entry
+    tk.Button(settings_tab, text="Delete Last Entry", command=delete_last_entry, font=font_style).pack(pady=10)
+
+    tk.Button(settings_tab, text="Import and Export Data", command=sequential_import, font=font_style).pack(pady=10)  # Changed from ttk.Button to tk.Button
+
+    # SQLite backend: one-shot migration from the CSV log and export back to CSV
+    tk.Button(settings_tab, text="Migrate Log to SQLite", command=migrate_to_sqlite, font=font_style).pack(pady=10)
+    tk.Button(settings_tab, text="Export Log to CSV", command=export_to_csv, font=font_style).pack(pady=10)
+
+    #-----------------------------Page 3 - Focus target (filling time formula)-------------------------------
+
+    # Filling time = statistic of the daily minutes over the window + increment
+    focus_frame = tk.LabelFrame(settings_tab, text="Focus Target", font=font_style)
+    focus_frame.pack(fill='x', padx=10, pady=10)
+
+    focus_window_var = tk.StringVar(value=str(focus_target["window_days"]))
+    focus_statistic_var = tk.StringVar(value=focus_target["statistic"])
+    focus_increment_var = tk.StringVar(value=str(focus_target["increment"]))
+    tk.Label(focus_frame, text="Window (days):", font=font_style).pack(side="left", padx=5)
+    tk.Spinbox(focus_frame, from_=1, to=365, textvariable=focus_window_var, width=5, font=font_style).pack(side="left")
+    tk.Label(focus_frame, text="Statistic:", font=font_style).pack(side="left", padx=5)
+    ttk.Combobox(focus_frame, textvariable=focus_statistic_var, values=FOCUS_STATISTICS, state="readonly", width=8, font=font_style).pack(side="left")
+    tk.Label(focus_frame, text="+ minutes:", font=font_style).pack(side="left", padx=5)
+    tk.Spinbox(focus_frame, from_=0, to=240, textvariable=focus_increment_var, width=5, font=font_style).pack(side="left")
+    tk.Button(focus_frame, text="Save", command=save_focus_target_settings, font=font_style).pack(side="left", padx=10)
+
+    #-----------------------------Page 3 - Local API for dashboards-------------------------------
+
+    api_server_var = tk.BooleanVar(value=False)
+    api_server_check = tk.Checkbutton(settings_tab, text="Serve totals as JSON on localhost", variable=api_server_var, command=toggle_api_server, font=font_style)
+    api_server_check.pack(pady=5)
+
+    #-----------------------------Page 3 - Diagnostics (hot path timings)-------------------------------
+
+    diagnostics_frame = tk.LabelFrame(settings_tab, text="Diagnostics", font=font_style)
+    diagnostics_frame.pack(fill='both', expand=True, padx=10, pady=10)
+
+    diagnostics_buttons = tk.Frame(diagnostics_frame)
+    diagnostics_buttons.pack(side="bottom", fill='x', pady=5)
+    tk.Button(diagnostics_buttons, text="Refresh", command=refresh_diagnostics, font=font_style).pack(side="left", padx=5)
+    tk.Button(diagnostics_buttons, text="Reset", command=reset_diagnostics, font=font_style).pack(side="left", padx=5)
+    tk.Button(diagnostics_buttons, text="Export JSON", command=export_diagnostics, font=font_style).pack(side="left", padx=5)
+    profile_capture_var = tk.BooleanVar(value=False)
+    tk.Checkbutton(diagnostics_buttons, text="Capture cProfile", variable=profile_capture_var, command=toggle_profile_capture, font=font_style).pack(side="right", padx=5)
+
+    diagnostics_columns = ('Hot Path', 'Calls', 'Rows', 'Mean ms', 'p50 ms', 'p90 ms', 'p99 ms', 'Max ms')
+    diagnostics_tree = ttk.Treeview(diagnostics_frame, columns=diagnostics_columns, show='headings', height=8)
+    for column in diagnostics_columns:
+        diagnostics_tree.heading(column, text=column)
+        diagnostics_tree.column(column, width=80, anchor="e" if column != 'Hot Path' else "w")
+    diagnostics_tree.column('Hot Path', width=180)
+    diagnostics_tree.pack(fill='both', expand=True)
+    diagnostics_tree.tag_configure('oddrow', background="white")
+    diagnostics_tree.tag_configure('evenrow', background="#f0f0f0")
+
+    # -------------------------------- Application Initialization and Main Loop ---------------------------
+
+    # Deliver results from the background worker to the UI
+    drain_background_results()
+
+    # Update totals, entries, and analysis on startup
+    load_logged_tasks()
+    update_totals()
+    show_entries_for_today()
+    update_chart()
+    root.after(log_poll_ms, poll_log_changes)
+
+    # Run the application
+    root.mainloop()
\ No newline at end of file
@@ -0,0 +1,267 @@
+"""Optional local HTTP/JSON API over the time log, for dashboards that should not parse time_log.csv.
+
+An asyncio server (standard library only) answers GET requests on localhost:
+
+    /entries?date=YYYY-MM-DD              entries logged that day (default today)
+    /totals?date=YYYY-MM-DD               {task: minutes} for that day (default today)
+    /series?period=30days&task=Main&group=week
+                                          calculate_task_totals series; without `task`, every task
+
+Responses are cached per query and dropped when the log changes. Concurrent requests for the
+same uncached query share one computation, and the log is checked for changes at most once per
+`api_sync_interval`. All store access runs on one executor thread (the app passes its
+background worker), so the server never touches the log concurrently with the app and never
+runs on the Tk thread. Responses carry an ETag, so polling clients can send If-None-Match.
+
+    python time_log_api.py --log time_log.csv --port 8765
+"""
+import argparse
+import asyncio
+import json
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from urllib.parse import parse_qs, urlsplit
+
+from time_log_core import (
+    open_log_store, period_start_date,
+    calculate_task_totals, calculate_all_task_totals, GROUP_CHOICES,
+)
+
+# Global variables
+api_host = "127.0.0.1"  # Local only: the API has no authentication
+api_port = 8765
+api_sync_interval = 1.0  # Seconds between checks of the log for changes, however many clients poll
+max_request_bytes = 8192  # Longest request line or header accepted
+
+STATUS_TEXT = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+               405: "Method Not Allowed", 500: "Internal Server Error"}
+
+class ApiError(Exception):
+    """A request the API cannot answer; carries the HTTP status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+# ------------------------------ Queries ------------------------------ #
+
+def query_date(params):
+    text = params.get("date")
+    if text is None:
+        return datetime.now().date()
+    # Not parse_log_date: its memo is unbounded and request parameters are client-controlled
+    try:
+        return date.fromisoformat(text)
+    except ValueError:
+        raise ApiError(400, f"Invalid date: {text}") from None
+
+def query_period(params):
+    """The `period` parameter: 'all' or 'Ndays' with N >= 1 (default 7days)."""
+    period = params.get("period", "7days")
+    if period == "all":
+        return period
+    try:
+        days = int(period[:-len("days")]) if period.endswith("days") else 0
+        if days > 0:
+            period_start_date(period, datetime.now().date())
+    except (ValueError, OverflowError):  # Not a number, or reaching back past year 1
+        days = 0
+    if days <= 0:
+        raise ApiError(400, f"Invalid period: {period}")
+    return period
+
+def entries_response(store, params):
+    day = query_date(params)
+    return {"date": day.isoformat(),
+            "entries": [{"task": task, "start": start, "end": end, "duration": duration}
+                        for _, task, start, end, duration in store.rows_for_date(day)]}
+
+def totals_response(store, params):
+    day = query_date(params)
+    return {"date": day.isoformat(), "totals": store.day_totals(day)}
+
+def series_response(store, params):
+    period = query_period(params)
+    group = params.get("group", "day")
+    task = params.get("task")
+    if group not in dict(GROUP_CHOICES):
+        raise ApiError(400, f"Invalid group: {group}")
+    if task is None:
+        dates, tasks = calculate_all_task_totals(store, period, group)
+    else:
+        dates, totals = calculate_task_totals(store, period, task, group)
+        tasks = {task: totals}
+    return {"period": period, "group": group, "dates": [day.isoformat() for day in dates], "tasks": tasks}
+
+def encode_response(response):
+    """Return the JSON body of a response and its ETag (a checksum of the body)."""
+    body = json.dumps(response).encode()
+    return body, f'"{zlib.crc32(body):08x}"'
+
+ROUTES = {"/entries": entries_response, "/totals": totals_response, "/series": series_response}
+
+# ------------------------------ Server ------------------------------ #
+
+class TimeLogAPI:
+    """Serves ROUTES from a store returned by `get_store` (which may swap stores, as the app does)."""
+
+    def __init__(self, get_store, executor):
+        self.get_store = get_store
+        self.executor = executor
+        self.cache = {}  # (path, query, today) -> future of (encoded response body, ETag)
+        self.cache_owner = None  # (store id, store version) the cached responses were computed from
+        self.sync_future = None
+        self.synced_at = 0.0
+
+    async def sync(self):
+        """Let the store pick up changes by other writers, at most once per api_sync_interval."""
+        loop = asyncio.get_running_loop()
+        if self.sync_future is None or (self.sync_future.done() and loop.time() - self.synced_at >= api_sync_interval):
+            self.synced_at = loop.time()
+            self.sync_future = loop.run_in_executor(self.executor, lambda: self.get_store().sync())
+        await self.sync_future
+
+    async def response_body(self, path, params):
+        route = ROUTES.get(path)
+        if route is None:
+            raise ApiError(404, f"Unknown path: {path}")
+        await self.sync()
+        store = self.get_store()
+        owner = (id(store), store.version)
+        if self.cache_owner != owner:
+            self.cache.clear()
+            self.cache_owner = owner
+        key = (path, tuple(sorted(params.items())), datetime.now().date())
+        future = self.cache.get(key)
+        if future is None:
+            future = self.cache[key] = asyncio.get_running_loop().run_in_executor(
+                self.executor, lambda: encode_response(route(store, params)))
+        try:
+            return await future
+        except BaseException:
+            if self.cache.get(key) is future:
+                del self.cache[key]  # Do not cache failures
+            raise
+
+    async def handle(self, reader, writer):
+        """Answer requests on one connection until the client closes it (HTTP/1.1 keep-alive)."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = headers.get("connection", "").lower() != "close"
+                status, body, etag = await self.respond(request_line, headers)
+                head_only = request_line.startswith(b"HEAD ")  # Same headers (and Content-Length) as GET, no body
+                head = [f"HTTP/1.1 {status} {STATUS_TEXT[status]}", "Content-Type: application/json",
+                        f"Content-Length: {len(body)}", "Cache-Control: no-cache",
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+                if etag:
+                    head.append(f"ETag: {etag}")
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + (b"" if head_only else body))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass  # Client went away or sent an oversized line
+        finally:
+            writer.close()
+
+    async def respond(self, request_line, headers):
+        """Return (status, body, etag) for one request."""
+        try:
+            method, target, _ = request_line.decode("latin-1").split()
+        except ValueError:
+            return 400, json.dumps({"error": "Malformed request"}).encode(), None
+        if method not in ("GET", "HEAD"):
+            return 405, json.dumps({"error": "Only GET is supported"}).encode(), None
+        url = urlsplit(target)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            body, etag = await self.response_body(url.path, params)
+        except ApiError as e:
+            return e.status, json.dumps({"error": str(e)}).encode(), None
+        except Exception as e:
+            return 500, json.dumps({"error": str(e)}).encode(), None
+        if headers.get("if-none-match") == etag:
+            return 304, b"", etag
+        return 200, body, etag
+
+    async def serve(self, host=api_host, port=api_port, started=None):
+        server = await asyncio.start_server(self.handle, host, port, limit=max_request_bytes)
+        if started is not None:
+            started(server)
+        async with server:
+            await server.serve_forever()
+
+class ApiServerThread:
+    """Runs a TimeLogAPI on its own event loop thread, e.g. next to the Tk main loop."""
+
+    def __init__(self, get_store, executor, host=api_host, port=api_port):
+        self.api = TimeLogAPI(get_store, executor)
+        self.loop = asyncio.new_event_loop()
+        self.server = None
+        self.error = None
+        ready = threading.Event()
+
+        def started(server):
+            self.server = server
+            ready.set()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self.serve_task = self.loop.create_task(self.api.serve(host, port, started))
+            try:
+                self.loop.run_until_complete(self.serve_task)
+            except BaseException as e:  # Includes the CancelledError of stop()
+                self.error = e
+            finally:
+                ready.set()
+                # Close the connections of clients that are still polling
+                pending = asyncio.all_tasks(self.loop)
+                for task in pending:
+                    task.cancel()
+                self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+                self.loop.close()
+
+        self.thread = threading.Thread(target=run, name="time_log_api", daemon=True)
+        self.thread.start()
+        ready.wait()
+        if self.server is None:
+            raise OSError(f"Could not start the API server: {self.error}")
+
+    @property
+    def port(self):
+        return self.server.sockets[0].getsockname()[1]
+
+    def stop(self):
+        """Stop serving and wait for the loop thread to finish."""
+        self.loop.call_soon_threadsafe(self.serve_task.cancel)
+        self.thread.join()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the time log's totals as JSON on localhost")
+    parser.add_argument("--log", help="Time log to serve (default: the app's log)")
+    parser.add_argument("--host", default=api_host)
+    parser.add_argument("--port", type=int, default=api_port)
+    args = parser.parse_args()
+
+    store = open_log_store(args.log)
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="time_log_api")  # One thread owns the store
+    print(f"Serving {args.log or 'the time log'} on http://{args.host}:{args.port}/")
+    try:
+        asyncio.run(TimeLogAPI(lambda: store, executor).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""Headless chart drawing shared by the app's Analysis tab and the batch report.
+
+Only matplotlib's object API (Figure, no pyplot) is used, so the same styling renders in the
+Tk canvas, in scripts with the non-interactive Agg backend, and in worker processes:
+
+    python time_log_charts.py weekly_review.pdf --periods 7days 30days --group day
+    python time_log_charts.py reports/ --log time_log.csv
+
+One all-time aggregation of the log serves every (period x task) chart; the charts
+themselves are drawn in parallel on a process pool, since matplotlib rendering is
+CPU-bound and single-threaded.
+"""
+import argparse
+import io
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from time_log_core import (
+    log_file, open_log_store, daily_minutes_by_task, slice_daily_period, chart_series_from_daily,
+    RollingStats, PERIOD_CHOICES, GROUP_CHOICES, GROUP_LABEL_FORMATS, TREND_WINDOWS,
+    load_task_categories, merge_task_categories,
+)
+
+# Global variables
+ALL_TASKS = "All Tasks"  # Task choice that stacks every category in one chart
+GROUP_AXIS_LABELS = {'day': 'Date', 'week': 'Week Starting', 'month': 'Month', 'year': 'Year'}
+max_date_labels = 30  # Most date labels on the X-axis; beyond that only every n-th bar is labelled
+report_max_bars = 100  # Bar budget of a report page; longer ranges are downsampled like the app's chart
+report_figsize = (10, 5)  # Same size as the Analysis tab's figure
+
+# ------------------------------ Axis Formatting ------------------------------ #
+
+def format_duration_for_chart(minutes):
+    """Format duration in minutes to 'hh:mm' for the Y-axis."""
+    hours = int(minutes // 60)
+    remaining_minutes = int(minutes % 60)
+    return f"{hours:02d}:{remaining_minutes:02d}"
+
+def chart_tick_step(max_minutes):
+    """Pick a Y-axis tick spacing (in minutes) that keeps roughly a dozen ticks on the chart."""
+    for step in (30, 60, 120, 300, 600, 1200, 3000, 6000, 12000, 30000):
+        if max_minutes / step <= 12:
+            return step
+    return 60000
+
+def format_time_axis(ax, totals):
+    """Tick the Y-axis in hh:mm up to just above the tallest bar (at least 3 hours)."""
+    max_duration = max(totals) if totals else 0
+    step = chart_tick_step(max_duration)
+    max_minutes = max(int(max_duration // step + 1) * step, 180)  # Ensure the y-axis goes up to at least 3 hours (180 mins)
+    ax.set_yticks([i * step for i in range((max_minutes // step) + 1)])  # Create ticks every `step` minutes
+    ax.set_yticklabels([format_duration_for_chart(i * step) for i in range((max_minutes // step) + 1)])
+    ax.set_ylim(0, max_minutes)
+
+def format_date_axis(ax, dates, group):
+    """Label the bars with their bucket dates, only every n-th one on long ranges."""
+    label_step = max(1, math.ceil(len(dates) / max_date_labels))
+    ax.set_xticks(range(0, len(dates), label_step))
+    ax.set_xticklabels([date.strftime(GROUP_LABEL_FORMATS[group]) for date in dates[::label_step]], rotation=45, ha="right")
+    ax.set_xlabel(GROUP_AXIS_LABELS[group])
+
+def chart_title(task_type_chart):
+    if task_type_chart == ALL_TASKS:
+        return 'Task Duration by Category Over Selected Period'
+    return f'{task_type_chart} Task Duration Over Selected Period'
+
+def trend_label(group):
+    return f'{TREND_WINDOWS[group]}-{group} average'
+
+def task_color(task, categories):
+    """Stable color per category, so a task keeps its color between charts."""
+    from matplotlib import colormaps
+
+    categories = merge_task_categories(categories, [task])
+    return colormaps["tab20"](categories.index(task) % 20)
+
+# ------------------------------ Chart Drawing ------------------------------ #
+
+class BarChart:
+    """The Analysis chart's bars (stacked when there are several tasks), average line, trend and legend on one axes.
+
+    The artists are created once and updated in place, so the app's long-lived chart redraws
+    without rebuilding them; a report page draws its single series with a fresh BarChart.
+    """
+
+    def __init__(self, ax):
+        self.ax = ax
+        ax.yaxis.grid(True)
+        ax.set_ylabel('Total Duration (hh:mm)')
+        # Average line and its label, moved to the new average on every update
+        self.avg_line = ax.axhline(y=0, color='red', linestyle='--')
+        self.avg_text = ax.text(0, 0, '', color='red', verticalalignment='bottom')
+        # Rolling-average trend over the bars, fed with new points on every update
+        self.trend_line, = ax.plot([], [], color='darkorange', linewidth=2, zorder=3)
+        self.bars = None  # task -> its bar container
+
+    def update(self, dates, task_totals, task_type_chart, group, trend=None, categories=()):
+        """Show a series ({task: totals}); `categories` fixes the color of each stacked task."""
+        ax = self.ax
+
+        # Reuse the existing bars when the tasks and bar count match, otherwise swap in a new set
+        bar_width = 0.5  # Adjust this value to change the width of the bars
+        x = range(len(dates))
+        tasks = list(task_totals)
+        bottoms = [0] * len(dates)
+        reuse = self.bars is not None and list(self.bars) == tasks and all(len(bars) == len(dates) for bars in self.bars.values())
+        if not reuse and self.bars is not None:
+            for bars in self.bars.values():
+                bars.remove()
+            self.bars = None
+        new_bars = {}
+        for task in tasks:
+            values = task_totals[task]
+            if reuse:
+                for bar, value, bottom in zip(self.bars[task], values, bottoms):
+                    bar.set_y(bottom)
+                    bar.set_height(value)
+            else:
+                color = 'skyblue' if len(tasks) == 1 else task_color(task, categories)
+                new_bars[task] = ax.bar(x, values, bottom=bottoms, color=color, width=bar_width, label=task)
+            bottoms = [bottom + value for bottom, value in zip(bottoms, values)]
+        if not reuse:
+            self.bars = new_bars
+        totals = bottoms  # Stacked height of each bar
+        ax.set_xlim(-0.75, len(dates) - 0.25)
+
+        # Trailing mean of the last few buckets, drawn through the bar centers
+        self.trend_line.set_data(list(x) if trend else [], trend or [])
+        self.trend_line.set_label(trend_label(group))
+
+        # A legend only makes sense for a stacked chart
+        if len(tasks) > 1:
+            ax.legend(loc='upper left', fontsize='small', ncol=2)
+        elif ax.get_legend() is not None:
+            ax.get_legend().remove()
+
+        # Date labels (X-Axis) and hh:mm ticks (Y-Axis)
+        format_date_axis(ax, dates, group)
+        format_time_axis(ax, totals)
+
+        # Move the average line
+        average_duration = sum(totals) / len(totals) if totals else 0
+        self.avg_line.set_ydata([average_duration, average_duration])
+        self.avg_text.set_position((x[-1] if totals else 0, average_duration + 10))
+        self.avg_text.set_text(f'Avg: {format_duration_for_chart(average_duration)}')
+
+        ax.set_title(chart_title(task_type_chart))
+
+    def set_visible(self, visible):
+        """Show or hide every artist, e.g. while the app's chart shows a heatmap instead."""
+        for bars in (self.bars or {}).values():
+            for bar in bars:
+                bar.set_visible(visible)
+        for artist in (self.avg_line, self.avg_text, self.trend_line):
+            artist.set_visible(visible)
+
+def draw_chart(fig, dates, task_totals, task_type_chart, group, trend=None, categories=()):
+    """Draw one series into a fresh figure with the Analysis tab's BarChart; returns the BarChart."""
+    fig.subplots_adjust(bottom=0.2)  # Leave room for the rotated date labels
+    chart = BarChart(fig.add_subplot())
+    chart.update(dates, task_totals, task_type_chart, group, trend, categories)
+    return chart
+
+def render_chart_page(page):
+    """Render one report page with Agg (runs in a worker process).
+
+    Writes a PNG to page["path"] and returns it, or returns the PNG bytes when there is no path.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=report_figsize, dpi=page["dpi"])
+    FigureCanvasAgg(fig)
+    draw_chart(fig, page["dates"], page["task_totals"], page["task"], page["group"], page["trend"], page["categories"])
+    if page["path"]:
+        fig.savefig(page["path"], format="png")
+        return page["path"]
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png")
+    return buffer.getvalue()
+
+# ------------------------------ Batch Report ------------------------------ #
+
+def build_report_pages(store, periods, tasks, group="day", dpi=100, max_buckets=report_max_bars):
+    """Compute the series of every (period, task) chart from one all-time aggregation of the log.
+
+    Returns one page dict per chart, in period-major order, ready for render_chart_page.
+    """
+    today = datetime.now().date()
+    first_ordinal, task_names, daily = daily_minutes_by_task(store, "all", today)
+    stats = RollingStats(first_ordinal, task_names, daily)  # Trend lines for every chart from the same matrix
+    categories = merge_task_categories(load_task_categories(), task_names)
+
+    pages = []
+    for period in periods:
+        period_first, period_daily = slice_daily_period(first_ordinal, daily, period, today)
+        for task in tasks:
+            tasks_charted = None if task == ALL_TASKS else task
+            shown_group, dates, task_totals = chart_series_from_daily(
+                period_first, task_names, period_daily, tasks_charted, group, max_buckets)
+            pages.append({"period": period, "task": task, "group": shown_group, "dates": dates,
+                          "task_totals": task_totals, "trend": stats.bucket_trend(tasks_charted, dates, shown_group),
+                          "categories": categories, "dpi": dpi, "path": None})
+    return pages
+
+def render_report(output, log_path=None, periods=None, tasks=None, group="day", dpi=100, max_workers=None):
+    """Render every (period x task) chart as PNGs in a folder, or as a multi-page PDF when `output` ends in .pdf.
+
+    Periods default to every Analysis tab period and tasks to ALL_TASKS plus each category.
+    PDF pages embed the rendered images. Returns the PNG paths, or [output] for a PDF.
+    """
+    store = open_log_store(log_path)
+    periods = periods or [period for period, _ in PERIOD_CHOICES]
+    tasks = tasks or [ALL_TASKS] + merge_task_categories(load_task_categories(), store.task_names())
+    pages = build_report_pages(store, periods, tasks, group, dpi)
+
+    as_pdf = output.lower().endswith(".pdf")
+    if not as_pdf:
+        os.makedirs(output, exist_ok=True)
+        for page in pages:
+            name = f"{page['period']}_{page['task']}.png".replace(os.sep, "_").replace(" ", "_")
+            page["path"] = os.path.join(output, name)
+
+    # Spawn is safe on every platform; workers re-run the parent's __main__ script as __mp_main__ (see calculate_team_totals)
+    context = multiprocessing.get_context("spawn")
+    workers = max(1, min(len(pages), max_workers or os.cpu_count() or 1))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        rendered = list(pool.map(render_chart_page, pages))
+    if not as_pdf:
+        return rendered
+
+    from matplotlib.backends.backend_pdf import PdfPages
+    from matplotlib.figure import Figure
+    from matplotlib.image import imread
+
+    with PdfPages(output) as pdf:
+        for image in rendered:
+            fig = Figure(figsize=report_figsize, dpi=dpi)
+            fig.figimage(imread(io.BytesIO(image), format="png"))
+            pdf.savefig(fig, dpi=dpi)
+    return [output]
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the Analysis charts of a time log headlessly")
+    parser.add_argument("output", help="Folder for PNG files, or a .pdf file for a multi-page report")
+    parser.add_argument("--log", help=f"Time log to read (default: the app's log, {log_file})")
+    parser.add_argument("--periods", nargs="+", choices=[period for period, _ in PERIOD_CHOICES])
+    parser.add_argument("--tasks", nargs="+", help=f"Tasks to chart (default: '{ALL_TASKS}' and every category)")
+    parser.add_argument("--group", choices=[group for group, _ in GROUP_CHOICES], default="day")
+    parser.add_argument("--dpi", type=int, default=100)
+    parser.add_argument("--workers", type=int, help="Rendering processes (default: one per CPU core)")
+    args = parser.parse_args()
+
+    written = render_report(args.output, args.log, args.periods, args.tasks, args.group, args.dpi, args.workers)
+    print(f"Wrote {len(written)} file(s) to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1903 @@
+"""Headless core of the Time Log application: log storage, import pipeline and analytics.
+
+Nothing here imports Tk or matplotlib, so scripts, tests and benchmarks can use it directly.
+numpy and pandas are heavy, so they are imported inside the functions that need them rather
+than at module import.
+"""
+from array import array
+from collections import deque
+from datetime import date, datetime, timedelta
+import bisect
+import contextlib
+import cProfile
+import csv
+import functools
+import heapq
+import io
+import json
+import os
+import platform
+import pstats
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, writes are not guarded against other instances
+    fcntl = None
+
+# Global variables
+log_file = "time_log.csv"
+db_file = "time_log.db"  # Optional SQLite backend, used instead of log_file once it exists
+categories_file = "task_categories.json"  # User-defined task categories, in the order they are offered
+settings_file = "time_log_settings.json"  # Other user settings, such as the focus target formula
+tail_window_days = 30  # Days of history loaded at startup; older rows are read on demand
+import_chunk_rows = 50000  # Rows per chunk (and per sorted run) in the streaming importer
+rollup_suffix = ".rollup.json"  # Sidecar next to the log with per-day totals, e.g. time_log.csv.rollup.json
+rollup_check_bytes = 4096  # Size of the block whose checksum tells whether the covered part of the log changed
+lock_suffix = ".lock"  # Advisory lock file next to the log, e.g. time_log.csv.lock
+latency_samples = 1000  # Most recent latencies kept per hot path for the percentiles
+
+# ------------------------------ Diagnostics ------------------------------ #
+
+# Hot paths wrapped with @instrumented record their call count, rows scanned and recent latencies.
+# They run on both the Tk thread and the worker thread, so the stats are guarded by a lock.
+hot_path_stats = {}  # name -> {"calls", "rows", "total_ms", "latencies" (ms, most recent last)}
+hot_path_lock = threading.Lock()
+profilers = {}  # thread id -> cProfile.Profile, filled while profile capture is on
+profile_capture = False
+call_state = threading.local()  # Per-thread stack of rows-scanned counters for the instrumented calls in progress
+
+def add_rows_scanned(count):
+    """Credit `count` scanned rows to the innermost instrumented call running on this thread."""
+    stack = getattr(call_state, "rows", None)
+    if stack:
+        stack[-1] += count
+
+def record_hot_path(name, elapsed_ms, rows):
+    with hot_path_lock:
+        stats = hot_path_stats.get(name)
+        if stats is None:
+            stats = hot_path_stats[name] = {"calls": 0, "rows": 0, "total_ms": 0.0,
+                                            "latencies": deque(maxlen=latency_samples)}
+        stats["calls"] += 1
+        stats["rows"] += rows
+        stats["total_ms"] += elapsed_ms
+        stats["latencies"].append(elapsed_ms)
+
+def thread_profiler():
+    """Return this thread's profiler while capture is on (cProfile only sees the thread that enabled it)."""
+    with hot_path_lock:
+        if not profile_capture:
+            return None
+        return profilers.setdefault(threading.get_ident(), cProfile.Profile())
+
+def instrumented(name):
+    """Decorator: time every call of a hot path under `name`, and profile it while capture is on."""
+    def decorate(func):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            stack = call_state.__dict__.setdefault("rows", [])
+            stack.append(0)
+            profiler = thread_profiler() if profile_capture and len(stack) == 1 else None  # Outermost call only
+            if profiler is not None:
+                try:
+                    profiler.enable()
+                except ValueError:
+                    profiler = None  # Python 3.12+ allows one active profiler per interpreter; skip this call
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                if profiler is not None:
+                    profiler.disable()
+                rows = stack.pop()
+                if stack:
+                    stack[-1] += rows  # Nested hot paths also count towards their caller
+                record_hot_path(name, elapsed_ms, rows)
+        return timed
+    return decorate
+
+def percentile(sorted_samples, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_samples:
+        return 0.0
+    return sorted_samples[min(len(sorted_samples) - 1, int(fraction * len(sorted_samples)))]
+
+def hot_path_report():
+    """Return {name: summary} with call counts, rows scanned and latency percentiles in milliseconds."""
+    with hot_path_lock:
+        snapshot = {name: (stats["calls"], stats["rows"], stats["total_ms"], sorted(stats["latencies"]))
+                    for name, stats in hot_path_stats.items()}
+    report = {}
+    for name, (calls, rows, total_ms, latencies) in sorted(snapshot.items()):
+        report[name] = {
+            "calls": calls,
+            "rows_scanned": rows,
+            "mean_ms": round(total_ms / calls, 3),
+            "p50_ms": round(percentile(latencies, 0.50), 3),
+            "p90_ms": round(percentile(latencies, 0.90), 3),
+            "p99_ms": round(percentile(latencies, 0.99), 3),
+            "max_ms": round(latencies[-1], 3),
+        }
+    return report
+
+def export_hot_path_report(path):
+    """Write the hot path report as JSON, with enough context to attach to a bug report."""
+    report = {"python": platform.python_version(), "platform": platform.platform(),
+              "date": datetime.now().isoformat(timespec="seconds"), "hot_paths": hot_path_report()}
+    with open(path, 'w') as file:
+        json.dump(report, file, indent=2)
+        file.write("\n")
+
+def reset_hot_path_stats():
+    with hot_path_lock:
+        hot_path_stats.clear()
+
+def start_profile_capture():
+    """Start collecting cProfile data for every instrumented call, on any thread."""
+    global profile_capture
+    with hot_path_lock:
+        profilers.clear()
+        profile_capture = True
+
+def stop_profile_capture(path=None):
+    """Stop collecting and, if `path` is given, write the merged stats there (readable with pstats/snakeviz).
+
+    Returns False when nothing was captured.
+    """
+    global profile_capture
+    with hot_path_lock:
+        profile_capture = False
+        captured = list(profilers.values())
+        profilers.clear()
+    merged = None
+    for profiler in captured:
+        profiler.disable()
+        try:
+            stats = pstats.Stats(profiler)
+        except TypeError:
+            continue  # This thread's profiler recorded nothing
+        if merged is None:
+            merged = stats
+        else:
+            merged.add(stats)
+    if merged is None:
+        return False
+    if path:
+        merged.dump_stats(path)
+    return True
+
+# ------------------------------ File Locking ------------------------------ #
+
+# Several app instances (or the importer) may write the same log. Writers hold an exclusive
+# fcntl lock and readers of fresh bytes a shared one. The lock is taken on a sidecar file,
+# because atomic rewrites replace the log itself.
+held_locks = threading.local()  # Per-thread set of log paths whose lock is already held
+
+@contextlib.contextmanager
+def log_file_lock(path, exclusive=True, create=True):
+    """Hold the advisory lock of a log file; re-entrant within a thread, a no-op where fcntl is missing.
+
+    With create=False an existing lock file is joined but none is made, for logs the app does not own.
+    """
+    held = held_locks.__dict__.setdefault("paths", set())
+    if fcntl is None or path in held:
+        yield
+        return
+    try:
+        lock = open(path + lock_suffix, 'a' if create else 'r')
+    except OSError:  # e.g. a read-only folder, or no lock file to join: carry on unguarded
+        yield
+        return
+    with lock:
+        fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        held.add(path)
+        try:
+            yield
+        finally:
+            held.discard(path)
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+def file_state(path):
+    """Return (size, mtime_ns, inode) of a file, or None when it does not exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+# ------------------------------ CSV File Management ------------------------------ #
+
+def ensure_csv_file():
+    """Ensure the CSV file exists and has the correct header."""
+    if not os.path.exists(log_file):
+        with open(log_file, 'w', newline='') as file:
+            writer = csv.writer(file)
+           
+
+@functools.lru_cache(maxsize=None)
+def parse_log_date(text):
+    """Parse a YYYY-MM-DD date. Memoized: a log repeats each date on every row of that day."""
+    try:
+        return date.fromisoformat(text)
+    except ValueError:
+        return datetime.strptime(text, "%Y-%m-%d").date()  # Also accepts unpadded dates like 2024-1-5
+
+def parse_log_row(row):
+    """Parse a CSV row into (date, task, start, end, duration), or None if the row is malformed."""
+    try:
+        log_date, task, start, end, duration = row
+        log_date = parse_log_date(log_date)
+        duration = int(duration) if duration.isdigit() else float(duration)
+    except ValueError:
+        return None  # Header line or a corrupted row
+    return log_date, task, start, end, duration
+
+def iter_lines_reversed(file, block_size=8192):
+    """Yield (offset, line) pairs of a binary file from the last line to the first, reading fixed-size blocks backwards."""
+    file.seek(0, os.SEEK_END)
+    position = file.tell()
+    remainder = b''
+    while position > 0:
+        read_size = min(block_size, position)
+        position -= read_size
+        file.seek(position)
+        pieces = (file.read(read_size) + remainder).split(b'\n')
+        remainder = pieces[0]  # May continue in the previous block
+        offset = position + len(remainder) + 1
+        complete = []
+        for piece in pieces[1:]:
+            complete.append((offset, piece))
+            offset += len(piece) + 1
+        yield from reversed(complete)
+    yield 0, remainder
+
+def parse_log_line(line):
+    """Parse one raw (bytes) line of the log, or return None for blank and malformed lines."""
+    text = line.decode('utf-8', errors='replace').strip()
+    return parse_log_row(next(csv.reader([text]))) if text else None
+
+def replace_file_atomically(path, write, mode='w'):
+    """Call write(file) on a new temporary file and swap it in with os.replace, so a crash never leaves a half-written log.
+
+    The temporary file is unique to the call, sits next to `path` (os.replace cannot cross file
+    systems) and gets the permissions of the file it replaces.
+    """
+    with log_file_lock(path):
+        if not os.path.exists(path):
+            open(path, 'a').close()  # Created with the usual permissions, which the copy below takes over
+        permissions = os.stat(path).st_mode & 0o7777
+        descriptor, temp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                                                 dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            with open(descriptor, mode, newline=None if 'b' in mode else '') as file:
+                write(file)
+                file.flush()
+                os.fsync(file.fileno())
+            os.chmod(temp_path, permissions)
+            os.replace(temp_path, path)
+        except BaseException:
+            with contextlib.suppress(OSError):  # Must not hide the original error
+                os.remove(temp_path)  # Leave the original log untouched
+            raise
+
+def write_rows_atomically(path, rows):
+    """Write rows as the whole log, atomically (see replace_file_atomically)."""
+    replace_file_atomically(path, lambda file: csv.writer(file).writerows(rows))
+
+@functools.lru_cache(maxsize=None)
+def log_field_ordinal(field):
+    """Day ordinal of the raw (bytes) first field of a log line, or None when it is not a date."""
+    try:
+        return parse_log_date(field.strip().decode('ascii')).toordinal()
+    except (UnicodeDecodeError, ValueError):
+        return None
+
+def rewrite_log_lines(path, drop_day=None, new_rows=()):
+    """Atomically rewrite the log, copying its lines through byte for byte.
+
+    Lines dated `drop_day` are left out, and `new_rows` (sorted by date) are written after the
+    lines of their date. Kept rows keep their exact text (times, fractional durations, line
+    endings), and blank or malformed lines stay after the line they followed.
+    """
+    drop_ordinal = drop_day.toordinal() if drop_day is not None else None
+
+    def write(out):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        pending = iter(new_rows)
+        row = next(pending, None)
+        ended = True  # Whether the output so far ends with a line break
+
+        def write_new_rows(before):
+            """Write the new rows dated before the `before` ordinal (all of them for None)."""
+            nonlocal row, ended
+            while row is not None and (before is None or row[0].toordinal() < before):
+                if not ended:
+                    out.write(b"\r\n")  # The log's last line had no line break
+                writer.writerow(row)
+                out.write(buffer.getvalue().encode())
+                buffer.seek(0)
+                buffer.truncate()
+                ended = True
+                row = next(pending, None)
+
+        with open(path, 'rb') as file:
+            for line in file:
+                ordinal = log_field_ordinal(line.split(b',', 1)[0])
+                if ordinal is not None:
+                    write_new_rows(ordinal)
+                    if ordinal == drop_ordinal:
+                        continue
+                out.write(line)
+                ended = line.endswith(b"\n")
+        write_new_rows(None)
+    replace_file_atomically(path, write, 'wb')
+
+@instrumented("read_log_tail")
+def read_log_tail(path, since):
+    """Read the rows dated on or after `since`, seeking backwards from the end of the log.
+
+    Rows are appended in date order, so reading stops at the first row older than the window.
+    """
+    rows = []
+    if not os.path.exists(path):
+        return rows
+    with open(path, 'rb') as file:
+        for _, line in iter_lines_reversed(file):
+            parsed = parse_log_line(line)
+            if parsed is None:
+                continue
+            if parsed[0] < since:
+                break
+            rows.append(parsed)
+    rows.reverse()
+    add_rows_scanned(len(rows))
+    return rows
+
+def build_date_offset_index(path, index=None, start=0):
+    """Scan the log from byte `start` and return (sorted list of (date, byte offset of that date's first row), bytes indexed).
+
+    A given `index` (of the bytes before `start`) is extended in place. A last line without a line
+    break may still be being written, so it is left out of the bytes indexed and scanned again by
+    the next extension.
+    """
+    index = [] if index is None else index
+    if not os.path.exists(path):
+        return index, 0
+    offset = start
+    previous_key = None
+    with open(path, 'rb') as file:
+        file.seek(start)
+        for line in file:
+            key = line[:10]
+            if key != previous_key:
+                previous_key = key
+                try:
+                    day = parse_log_date(key.decode('ascii'))
+                except (UnicodeDecodeError, ValueError):
+                    day = None  # Blank or malformed line
+                if day is not None and (not index or day > index[-1][0]):
+                    index.append((day, offset))  # Out-of-order rows are still reached by the sequential scan
+            if line.endswith(b'\n'):
+                offset += len(line)
+    return index, offset
+
+# ------------------------------ Compact Row Storage ------------------------------ #
+
+NO_TIME = 0xFFFF  # Stored for a missing or unreadable start/end time
+
+def time_to_minutes(text):
+    """Convert 'HH:MM' to minutes of the day, or NO_TIME."""
+    if len(text) == 5 and text[2] == ':':
+        try:
+            return int(text[:2]) * 60 + int(text[3:])
+        except ValueError:
+            return NO_TIME
+    hours, _, minutes = text.partition(':')
+    try:
+        return int(hours) * 60 + int(minutes[:2])
+    except ValueError:
+        return NO_TIME
+
+def minutes_to_time(minutes):
+    return "" if minutes == NO_TIME else f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+def compact_duration(duration):
+    """Whole minutes clamped to the uint16 range (a session would need to last 45 days to overflow)."""
+    return min(max(int(round(duration)), 0), 0xFFFF)
+
+class LogRows:
+    """Array-backed log rows: about 12 bytes per row instead of a tuple of five Python objects.
+
+    Dates are day ordinals (int32), tasks are ids into `task_names` (uint16), start and end are
+    minutes of the day (uint16) and durations whole minutes (uint16). Indexing and iterating
+    still produce (date, task, start, end, duration) tuples, built on demand.
+    """
+
+    def __init__(self):
+        self.ordinals = array('i')
+        self.task_ids = array('H')
+        self.starts = array('H')
+        self.ends = array('H')
+        self.durations = array('H')
+        self.task_names = []  # Task id -> name
+        self.task_index = {}  # Task name -> id
+
+    def __len__(self):
+        return len(self.ordinals)
+
+    def __getitem__(self, index):
+        return (date.fromordinal(self.ordinals[index]), self.task_names[self.task_ids[index]],
+                minutes_to_time(self.starts[index]), minutes_to_time(self.ends[index]), self.durations[index])
+
+    def __iter__(self):
+        return (self[index] for index in range(len(self)))
+
+    def task_id(self, task):
+        task_id = self.task_index.get(task)
+        if task_id is None:
+            if len(self.task_names) == 0x10000:
+                raise ValueError("A log can hold at most 65536 different tasks")
+            task_id = self.task_index[task] = len(self.task_names)
+            self.task_names.append(task)
+        return task_id
+
+    def append(self, ordinal, task, start, end, duration):
+        self.ordinals.append(ordinal)
+        self.task_ids.append(self.task_id(task))
+        self.starts.append(start)
+        self.ends.append(end)
+        self.durations.append(duration)
+
+    def pop(self):
+        row = self[-1]
+        for column in (self.ordinals, self.task_ids, self.starts, self.ends, self.durations):
+            column.pop()
+        return row
+
+def read_log_rows(path):
+    """Parse a whole log file into LogRows in bulk (see parse_log_text)."""
+    if not os.path.exists(path):
+        return LogRows()
+    with open(path, 'r', newline='') as file:
+        return parse_log_text(file.read())
+
+def parse_log_text(text):
+    """Parse log text into LogRows in bulk.
+
+    Each distinct date, task, time and duration string is converted once, and the columns are
+    then filled by map() over those lookups instead of a Python loop per row.
+    """
+    rows = LogRows()
+    lines = text.splitlines()
+    if '"' not in text and text.count(',') == 4 * len(lines) and all(lines):
+        # Plain log: every line has five fields, so one split yields all fields in row order
+        fields = ",".join(lines).split(',')
+        dates, tasks, starts, ends, durations = (fields[column::5] for column in range(5))
+        records = None
+    else:
+        records = [record for record in csv.reader(lines) if len(record) == 5]
+        if not records:
+            return rows
+        dates, tasks, starts, ends, durations = zip(*records)
+
+    unique_dates, unique_durations = set(dates), set(durations)
+    date_ordinals = {}
+    for value in unique_dates:
+        try:
+            date_ordinals[value] = parse_log_date(value).toordinal()
+        except ValueError:
+            pass  # Header line or a corrupted row
+    minutes = {}
+    for value in unique_durations:
+        try:
+            minutes[value] = compact_duration(int(value) if value.isdigit() else float(value))
+        except (ValueError, OverflowError):
+            pass
+    if len(date_ordinals) < len(unique_dates) or len(minutes) < len(unique_durations):
+        records = [record for record in (records or zip(dates, tasks, starts, ends, durations))
+                   if record[0] in date_ordinals and record[4] in minutes]
+        if not records:
+            return rows
+        dates, tasks, starts, ends, durations = zip(*records)
+
+    times = {value: time_to_minutes(value) for value in set(starts) | set(ends)}
+    task_ids = {task: rows.task_id(task) for task in dict.fromkeys(tasks)}
+    rows.ordinals = array('i', map(date_ordinals.__getitem__, dates))
+    rows.task_ids = array('H', map(task_ids.__getitem__, tasks))
+    rows.starts = array('H', map(times.__getitem__, starts))
+    rows.ends = array('H', map(times.__getitem__, ends))
+    rows.durations = array('H', map(minutes.__getitem__, durations))
+    return rows
+
+# ------------------------------ Daily Rollup Sidecar ------------------------------ #
+
+def block_checksum(path, end):
+    """CRC32 of the (up to) rollup_check_bytes bytes of a file that end at byte `end`."""
+    start = max(0, end - rollup_check_bytes)
+    with open(path, 'rb') as file:
+        file.seek(start)
+        return zlib.crc32(file.read(end - start))
+
+def read_rollup(path):
+    """Load a rollup sidecar, or return None when it is missing or unreadable."""
+    try:
+        with open(path, 'r') as file:
+            rollup = json.load(file)
+        rollup["days"] = {int(ordinal): totals for ordinal, totals in rollup["days"].items()}
+        return rollup
+    except (OSError, ValueError, KeyError, AttributeError):
+        return None
+
+def write_rollup(path, rollup):
+    """Save a rollup sidecar atomically; failing to save only costs a re-parse next time.
+
+    Like replace_file_atomically, each call writes its own temporary file, so two stores saving
+    the same sidecar at once cannot interleave their JSON.
+    """
+    try:
+        descriptor, temp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                                                 dir=os.path.dirname(os.path.abspath(path)))
+    except OSError:
+        return
+    try:
+        with open(descriptor, 'w') as file:
+            json.dump(rollup, file, separators=(',', ':'))
+        os.replace(temp_path, path)
+    except OSError:
+        with contextlib.suppress(OSError):
+            os.remove(temp_path)
+
+def add_day_totals(days, rows, count):
+    """Add the minutes of the first `count` rows into days ({day ordinal: {task: minutes}})."""
+    import numpy as np
+
+    if count <= 0:
+        return
+    ordinals = np.frombuffer(rows.ordinals, dtype=np.int32)[:count]
+    first = int(ordinals.min())
+    task_count = len(rows.task_names)
+    keys = (ordinals - first).astype(np.int64) * task_count + np.frombuffer(rows.task_ids, dtype=np.uint16)[:count]
+    totals = np.bincount(keys, weights=np.frombuffer(rows.durations, dtype=np.uint16)[:count])
+    counts = np.bincount(keys)
+    for key in np.flatnonzero(counts).tolist():
+        day = days.setdefault(first + key // task_count, {})
+        task = rows.task_names[key % task_count]
+        day[task] = day.get(task, 0) + int(totals[key])
+
+# ------------------------------ In-Memory Log Store ------------------------------ #
+
+class LogStore:
+    """In-memory copy of the time log, indexed by date and task.
+
+    The CSV file is parsed once; afterwards appends and deletes update the file
+    and the index together, so refreshes only touch the days they display.
+    Only the last `tail_window_days` are read at first; older history is loaded
+    when a query reaches past the window. Changes by other writers are picked up
+    by sync(), which every query runs first.
+
+    A read_only store is for logs the app does not own (a teammate's, a report's input):
+    it leaves no rollup or lock file next to the log and must not be written to.
+    """
+
+    def __init__(self, path, read_only=False):
+        self.path = path
+        self.read_only = read_only
+        self.version = 0  # Bumped on every change so cached aggregates can tell they are stale
+        self.loaded = False
+        self.window_start = None  # Oldest date held in memory, None when the whole file is loaded
+        self.rows = LogRows()  # Every row in memory, in file order
+        self.by_date = {}  # day ordinal -> array of indices into rows logged on that date
+        self.daily = {}    # day ordinal -> {task: total minutes}
+        self.date_offsets = None  # Sorted (date, byte offset) pairs for the history browser, built on first use
+        self.date_offsets_state = None  # (bytes indexed, inode, block_checksum of them), see _update_date_offsets()
+        self.rollup_cache = None  # (version, (cut, days)) of the last rollup read, see rollup()
+        self.rolling_stats = None  # RollingStats kept current by append, see get_rolling_stats()
+        self.file_state = None  # (bytes read, mtime_ns, inode) of the log as last read or written, see sync()
+        self.file_checksum = None  # block_checksum of the bytes read, to tell appends from rewrites
+
+    def _index(self, ordinal, task, start, end, duration):
+        day_rows = self.by_date.get(ordinal)
+        if day_rows is None:
+            day_rows = self.by_date[ordinal] = array('I')
+            self.daily[ordinal] = {}
+        day_rows.append(len(self.rows))
+        self.rows.append(ordinal, task, start, end, duration)
+        totals = self.daily[ordinal]
+        totals[task] = totals.get(task, 0) + duration
+
+    def _index_row(self, row):
+        self._index(row[0].toordinal(), row[1], time_to_minutes(row[2]), time_to_minutes(row[3]), compact_duration(row[4]))
+
+    def _unindex_last(self):
+        log_date, task, _, _, duration = self.rows.pop()
+        ordinal = log_date.toordinal()
+        day_rows = self.by_date[ordinal]
+        day_rows.pop()
+        self.daily[ordinal][task] -= duration
+        if not day_rows:
+            del self.by_date[ordinal]
+            del self.daily[ordinal]
+
+    def _reset(self):
+        self.rows = LogRows()
+        self.by_date = {}
+        self.daily = {}
+
+    def _index_all(self):
+        """Build by_date and daily for every row at once with NumPy (after a full load)."""
+        import numpy as np
+
+        self.by_date = {}
+        self.daily = {}
+        rows = self.rows
+        if not len(rows):
+            return
+        ordinals = np.frombuffer(rows.ordinals, dtype=np.int32)
+        order = np.argsort(ordinals, kind='stable')  # Row indices grouped by day, file order within a day
+        sorted_ordinals = ordinals[order]
+        bounds = np.flatnonzero(np.diff(sorted_ordinals)) + 1
+        bounds = np.concatenate(([0], bounds, [len(order)]))
+
+        # Minutes (and row counts) per (day, task) in one pass
+        task_count = len(rows.task_names)
+        keys = np.repeat(np.arange(len(bounds) - 1), np.diff(bounds)) * task_count
+        keys += np.frombuffer(rows.task_ids, dtype=np.uint16)[order]
+        durations = np.frombuffer(rows.durations, dtype=np.uint16)[order]
+        totals = np.bincount(keys, weights=durations, minlength=(len(bounds) - 1) * task_count).reshape(-1, task_count)
+        counts = np.bincount(keys, minlength=(len(bounds) - 1) * task_count).reshape(-1, task_count)
+
+        order = order.astype(np.uint32).tobytes()
+        for day, (low, high) in enumerate(zip(bounds[:-1].tolist(), bounds[1:].tolist())):
+            ordinal = int(sorted_ordinals[low])
+            self.by_date[ordinal] = array('I', order[low * 4:high * 4])
+            self.daily[ordinal] = {rows.task_names[task]: int(totals[day, task]) for task in np.flatnonzero(counts[day])}
+
+    @instrumented("load_log")
+    def load(self, since=None):
+        """(Re)build the index from the CSV file, or from its tail when `since` is given."""
+        self._reset()
+        with log_file_lock(self.path, exclusive=False, create=not self.read_only):  # No appends halfway through the read
+            if since is not None:
+                for row in read_log_tail(self.path, since):
+                    self._index_row(row)
+            else:
+                self.rows = read_log_rows(self.path)
+                self._index_all()
+                add_rows_scanned(len(self.rows))  # read_log_tail counts its own rows
+            self._mark_synced()
+        self.window_start = since
+        self.loaded = True
+
+    def _mark_synced(self):
+        """Remember the log as this store last read or wrote it (with the lock held)."""
+        self.file_state = file_state(self.path)
+        self.file_checksum = block_checksum(self.path, self.file_state[0]) if self.file_state else None
+
+    @instrumented("sync_log")
+    def sync(self):
+        """Pick up changes made to the log by other writers (another instance, a sync tool).
+
+        Costs one os.stat when the file is unchanged. When it only grew, just the appended
+        bytes are parsed; any other change (truncation, a rewrite, a replaced file) makes
+        the next query reload. Returns True when the log changed.
+        """
+        if not self.loaded:
+            return False
+        state = file_state(self.path)
+        if state == self.file_state:
+            return False
+        previous = self.file_state
+        if (state is not None and previous is not None and state[2] == previous[2] and state[0] > previous[0]
+                and block_checksum(self.path, previous[0]) == self.file_checksum):
+            with log_file_lock(self.path, exclusive=False, create=not self.read_only):
+                with open(self.path, 'rb') as file:
+                    file.seek(previous[0])
+                    appended = file.read()
+            end = appended.rfind(b'\n') + 1  # A line still being written is left for the next sync
+            if not end:
+                return False
+            rows = parse_log_text(appended[:end].decode('utf-8', errors='replace'))
+            for row in rows:
+                self._index_row(row)
+            add_rows_scanned(len(rows))
+            self.file_state = (previous[0] + end, state[1], state[2])
+            self.file_checksum = block_checksum(self.path, previous[0] + end)
+        else:
+            self.loaded = False  # Rewritten or replaced: reload on next use
+        self.version += 1
+        return True
+
+    def ensure_since(self, day):
+        """Make sure every row dated on or after `day` is in memory (None means the whole log)."""
+        self.sync()
+        if self.loaded and (self.window_start is None or (day is not None and day >= self.window_start)):
+            return
+        if day is not None:
+            day = min(day, datetime.now().date() - timedelta(days=tail_window_days))
+        self.load(day)
+
+    def ensure_loaded(self):
+        self.ensure_since(datetime.now().date())
+
+    def _rewrite(self, write):
+        """Rewrite the CSV file with write(path) and rebuild the index from it."""
+        self.version += 1
+        self._drop_rollup()
+        write(self.path)
+        self.load()  # Re-reading in bulk is faster than indexing the rows one by one
+
+    # -- Queries -- #
+
+    def rows_for_date(self, day):
+        """Return the rows logged on the given date, in file order."""
+        self.ensure_since(day)
+        return [self.rows[index] for index in self.by_date.get(day.toordinal(), ())]
+
+    def day_totals(self, day):
+        """Return {task: minutes} for the given date."""
+        self.ensure_since(day)
+        return dict(self.daily.get(day.toordinal(), {}))
+
+    def daily_minutes(self, task, dates):
+        """Return the minutes logged for a task on each of the given dates."""
+        if dates:
+            self.ensure_since(min(dates))
+        return [self.daily.get(day.toordinal(), {}).get(task, 0) for day in dates]
+
+    def columns(self, since=None):
+        """Return (day ordinals, task ids, minutes, task names) for the rows dated on or after `since`.
+
+        The first three are NumPy arrays; task ids index into the task names list. When `since`
+        reaches past the in-memory window, the older days come from the daily rollup as one entry
+        per day and task, instead of loading the whole log (read_only stores load it instead).
+        """
+        import numpy as np
+
+        self.sync()  # Before the rollup, which is cached per version
+        cut, days = None, {}
+        window = datetime.now().date() - timedelta(days=tail_window_days)
+        if (since is None or since < window) and not (self.loaded and self.window_start is None) and not self.read_only:
+            cut, days = self.rollup()
+        self.ensure_since(since if cut is None else date.fromordinal(cut))
+
+        rows = self.rows
+        ordinals = np.frombuffer(rows.ordinals, dtype=np.int32)  # Zero-copy views of the array columns
+        task_ids = np.frombuffer(rows.task_ids, dtype=np.uint16)
+        minutes = np.frombuffer(rows.durations, dtype=np.uint16).astype(np.float64)
+        first = since.toordinal() if since is not None else 0
+        lower = max(first, cut or 0)  # Rows before the open tail are already summed in the rollup
+        if lower:
+            keep = ordinals >= lower
+            ordinals, task_ids, minutes = ordinals[keep], task_ids[keep], minutes[keep]
+        else:
+            ordinals, task_ids = ordinals.copy(), task_ids.copy()  # Appends must not resize a buffer a view still holds
+
+        task_index = {task: task_id for task_id, task in enumerate(rows.task_names)}
+        entries = [(ordinal, task_index.setdefault(task, len(task_index)), total)
+                   for ordinal, totals in days.items() if first <= ordinal < cut
+                   for task, total in totals.items()]
+        if entries:
+            day_ordinals, day_tasks, day_minutes = zip(*entries)
+            ordinals = np.concatenate((np.array(day_ordinals, dtype=np.int32), ordinals))
+            task_ids = np.concatenate((np.array(day_tasks, dtype=np.uint16), task_ids))
+            minutes = np.concatenate((np.array(day_minutes, dtype=np.float64), minutes))
+        add_rows_scanned(len(ordinals))
+        return ordinals, task_ids, minutes, list(task_index)
+
+    def session_columns(self, since=None):
+        """Return (day ordinals, task ids, start minutes, end minutes, task names) for the rows dated on or after `since`.
+
+        Times are minutes of the day, NO_TIME where missing. The rollup holds no times, so this
+        loads the rows themselves as far back as `since`.
+        """
+        import numpy as np
+
+        self.ensure_since(since)
+        rows = self.rows
+        columns = [np.frombuffer(rows.ordinals, dtype=np.int32), np.frombuffer(rows.task_ids, dtype=np.uint16),
+                   np.frombuffer(rows.starts, dtype=np.uint16), np.frombuffer(rows.ends, dtype=np.uint16)]
+        keep = columns[0] >= (since.toordinal() if since is not None else 0)  # Copies, so appends can resize the arrays
+        columns = [column[keep] for column in columns]
+        add_rows_scanned(len(columns[0]))
+        return (*columns, list(rows.task_names))
+
+    def task_names(self):
+        """Return the distinct tasks in the in-memory window, in order of first appearance."""
+        self.ensure_loaded()
+        return list(self.rows.task_names)
+
+    def history_page(self, start_date, end_date, task=None, cursor=None, page_size=100):
+        """Return (rows, next cursor) for one page of history between two dates, optionally for one task.
+
+        The first page starts at the byte offset of `start_date` taken from the date index; later pages
+        resume from the offset returned as the cursor, so only the rows on the page are read.
+        The next cursor is None once the range is exhausted.
+        """
+        self._update_date_offsets()
+        if cursor is None:
+            position = bisect.bisect_left(self.date_offsets, (start_date,))
+            if position == len(self.date_offsets):
+                return [], None
+            cursor = self.date_offsets[position][1]
+
+        rows = []
+        with open(self.path, 'rb') as file:
+            file.seek(cursor)
+            while len(rows) < page_size:
+                line = file.readline()
+                if not line:
+                    return rows, None
+                parsed = parse_log_line(line)
+                if parsed is None or parsed[0] < start_date:
+                    continue
+                if parsed[0] > end_date:
+                    return rows, None
+                if task is None or parsed[1] == task:
+                    rows.append(parsed)
+            return rows, file.tell()
+
+    def _update_date_offsets(self):
+        """Index only the bytes appended since the last call; rescan the log only after a rewrite or truncation."""
+        state = file_state(self.path)
+        indexed = self.date_offsets_state
+        if state is None:
+            self.date_offsets, self.date_offsets_state = [], None
+            return
+        if (indexed is not None and state[2] == indexed[1] and state[0] >= indexed[0]
+                and block_checksum(self.path, indexed[0]) == indexed[2]):
+            if state[0] == indexed[0]:
+                return
+            index, end = build_date_offset_index(self.path, self.date_offsets, indexed[0])
+        else:
+            index, end = build_date_offset_index(self.path)
+        self.date_offsets = index
+        self.date_offsets_state = (end, state[2], block_checksum(self.path, end))
+
+    def row_key_index(self):
+        """Return a RowKeyIndex of every row in the log, built from the array columns in one NumPy pass."""
+        import numpy as np
+
+        self.ensure_since(None)
+        rows = self.rows
+        keys = pack_row_keys(np.frombuffer(rows.ordinals, dtype=np.int32), np.frombuffer(rows.task_ids, dtype=np.uint16),
+                             np.frombuffer(rows.starts, dtype=np.uint16), np.frombuffer(rows.ends, dtype=np.uint16))
+        last_ordinal = max(rows.ordinals) if len(rows) else 0
+        return RowKeyIndex(dict(rows.task_index), set(keys.tolist()), last_ordinal)
+
+    # -- Daily rollup -- #
+
+    def rollup(self):
+        """Return (cut, days): {day ordinal: {task: minutes}} for every day logged before `cut`.
+
+        `cut` is the ordinal of the last logged date; its rows are the open tail, which may still be
+        appended to or truncated, so they are left out. The totals are kept in a sidecar file, which
+        is trusted while the log's size and mtime match and otherwise reused if the checksum of the
+        block before the open tail still matches, parsing only the bytes after it. A log out of
+        date order at its end gets no sidecar. Returns (None, {}) for an empty or missing log.
+        """
+        if self.rollup_cache is None or self.rollup_cache[0] != self.version:
+            self.rollup_cache = (self.version, self._refresh_rollup())
+        return self.rollup_cache[1]
+
+    @instrumented("refresh_rollup")
+    def _refresh_rollup(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None, {}
+        sidecar = self.path + rollup_suffix
+        cached = read_rollup(sidecar)
+        if cached and (cached["size"], cached["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns):
+            return cached["cut"], cached["days"]
+        if cached and cached["covered"] <= stat.st_size and block_checksum(self.path, cached["covered"]) == cached["checksum"]:
+            covered, cut, days = cached["covered"], cached["cut"], cached["days"]  # Only parse what came after
+        else:
+            covered, cut, days = 0, None, {}  # Missing, or the covered part changed: rebuild
+
+        with open(self.path, 'rb') as file:
+            file.seek(covered)
+            rows = parse_log_text(file.read(stat.st_size - covered).decode('utf-8', errors='replace'))
+        add_rows_scanned(len(rows))
+        if len(rows):
+            cut = rows.ordinals[-1]
+            tail_rows = 0
+            while tail_rows < len(rows) and rows.ordinals[-1 - tail_rows] == cut:
+                tail_rows += 1
+            add_day_totals(days, rows, len(rows) - tail_rows)
+            covered = self._tail_offset(date.fromordinal(cut))
+        if cut is None:
+            return None, {}
+        if covered is None:
+            # Rows dated after the last one precede it (out of date order): there is no clean tail to
+            # resume from, so the totals are used as they are and rebuilt on the next refresh
+            return cut, days
+
+        write_rollup(sidecar, {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "covered": covered,
+                               "checksum": block_checksum(self.path, covered), "cut": cut, "days": days})
+        return cut, days
+
+    def _drop_rollup(self):
+        """Delete the sidecar after the log is rewritten; the next long-range query rebuilds it."""
+        self.rollup_cache = None
+        if self.read_only:
+            return
+        try:
+            os.remove(self.path + rollup_suffix)
+        except FileNotFoundError:
+            pass
+
+    # -- Mutations -- #
+
+    def append(self, log_date, task, start, end, duration):
+        """Append one entry to the CSV file and the index."""
+        with log_file_lock(self.path):
+            self.ensure_loaded()  # Also indexes rows other instances appended first
+            with open(self.path, 'a', newline='') as file:
+                writer = csv.writer(file)
+                writer.writerow([log_date, task, start, end, duration])
+            self._mark_synced()
+        self._index_row((log_date, task, start, end, duration))
+        self.version += 1
+        advance_rolling_stats(self, log_date, task, duration)
+
+    def append_rows(self, rows):
+        """Append rows sorted by date in one write (used by the merge import).
+
+        When the first row is older than the log's last date, appending would break the date
+        order, so the log is rewritten with the rows merged in after the lines of their date;
+        the existing lines are copied through unchanged.
+        """
+        if not rows:
+            return
+        with log_file_lock(self.path):
+            self.ensure_since(None)
+            if self.by_date and rows[0][0].toordinal() < max(self.by_date):
+                self._rewrite(lambda path: rewrite_log_lines(path, new_rows=rows))
+                return
+            with open(self.path, 'a', newline='') as file:
+                csv.writer(file).writerows(rows)
+            self._mark_synced()
+        for row in rows:
+            self._index_row(row)
+        self.version += 1
+
+    def _tail_offset(self, day):
+        """Return the byte offset where the trailing run of rows dated `day` starts.
+
+        Returns the file size when the log does not end with such rows, and None when
+        rows dated `day` are followed by later dates (so truncating would lose them).
+        """
+        with open(self.path, 'rb') as file:
+            cut = file.seek(0, os.SEEK_END)
+            for offset, line in iter_lines_reversed(file):
+                parsed = parse_log_line(line)
+                if parsed is None:
+                    continue
+                if parsed[0] > day:
+                    return None
+                if parsed[0] < day:
+                    break
+                cut = offset
+        return cut
+
+    def delete_date(self, day):
+        """Delete every entry logged on the given date.
+
+        Today's rows sit at the end of the file, so they are removed by truncating it in place.
+        """
+        with log_file_lock(self.path):
+            self.ensure_since(day)
+            if day.toordinal() not in self.by_date or not os.path.exists(self.path):
+                return
+            cut = self._tail_offset(day)
+            if cut is None or cut == os.path.getsize(self.path):
+                # Later dates follow, or the day's rows sit before out-of-order older ones: rewrite the whole history
+                self._rewrite(lambda path: rewrite_log_lines(path, drop_day=day))
+                return
+            with open(self.path, 'r+b') as file:
+                file.truncate(cut)
+            self._mark_synced()
+        while self.rows and self.rows[-1][0] == day:
+            self._unindex_last()
+        self.version += 1
+
+    def delete_last(self):
+        """Delete the last line of the file by truncating it at that line's offset."""
+        with log_file_lock(self.path):
+            self.ensure_loaded()
+            if not os.path.exists(self.path):
+                return
+            with open(self.path, 'r+b') as file:
+                for offset, line in iter_lines_reversed(file):
+                    if line.strip():
+                        file.truncate(offset)
+                        break
+                else:
+                    return
+            self._mark_synced()
+        if parse_log_line(line) is not None and self.rows:
+            self._unindex_last()
+        self.version += 1
+
+    def replace_all(self, rows):
+        """Replace the whole log with the given rows (used by the importer)."""
+        with log_file_lock(self.path):
+            self._rewrite(lambda path: write_rows_atomically(path, rows))
+
+    def clear(self):
+        """Empty the CSV file and start with an empty log."""
+        self._drop_rollup()
+        with log_file_lock(self.path):
+            open(self.path, 'w').close()
+            self._mark_synced()
+        self._reset()
+        self.version += 1
+        self.window_start = None
+        self.loaded = True
+
+# ------------------------------ SQLite Log Store ------------------------------ #
+
+class SQLiteLogStore:
+    """Log store backed by an SQLite table indexed on (date, task).
+
+    Offers the same methods as LogStore, but range queries and deletes only
+    touch the matching rows instead of the whole file.
+    """
+
+    def __init__(self, path, read_only=False):
+        self.path = path
+        self.version = 0  # Bumped on every change so cached aggregates can tell they are stale
+        self.rolling_stats = None  # RollingStats kept current by append, see get_rolling_stats()
+        if read_only:  # A database the app does not own: open it as is, without creating anything
+            self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+            self.data_version = self._data_version()
+            return
+        self.conn = sqlite3.connect(path, check_same_thread=False)  # Used from the background worker
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS time_log ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, log_date TEXT NOT NULL, task TEXT NOT NULL, "
+            "start TEXT, end TEXT, duration NUMERIC NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_time_log_date_task ON time_log (log_date, task)")
+        self.conn.commit()
+        self.data_version = self._data_version()
+
+    def _data_version(self):
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def load(self):
+        """Nothing to rebuild: the database is always current."""
+
+    def ensure_loaded(self):
+        pass
+
+    def sync(self):
+        """Bump the version when another connection changed the database; SQLite does the locking itself."""
+        data_version = self._data_version()
+        if data_version == self.data_version:
+            return False
+        self.data_version = data_version
+        self.version += 1
+        return True
+
+    # -- Queries -- #
+
+    def rows_for_date(self, day):
+        """Return the rows logged on the given date, in insertion order."""
+        cursor = self.conn.execute(
+            "SELECT task, start, end, duration FROM time_log WHERE log_date = ? ORDER BY id", (day.isoformat(),)
+        )
+        return [(day, task, start, end, duration) for task, start, end, duration in cursor]
+
+    def day_totals(self, day):
+        """Return {task: minutes} for the given date."""
+        cursor = self.conn.execute(
+            "SELECT task, SUM(duration) FROM time_log WHERE log_date = ? GROUP BY task", (day.isoformat(),)
+        )
+        return dict(cursor.fetchall())
+
+    def daily_minutes(self, task, dates):
+        """Return the minutes logged for a task on each of the given dates."""
+        if not dates:
+            return []
+        cursor = self.conn.execute(
+            "SELECT log_date, SUM(duration) FROM time_log WHERE log_date BETWEEN ? AND ? AND task = ? GROUP BY log_date",
+            (min(dates).isoformat(), max(dates).isoformat(), task),
+        )
+        totals = dict(cursor.fetchall())
+        return [totals.get(day.isoformat(), 0) for day in dates]
+
+    def columns(self, since=None):
+        """Return (day ordinals, task ids, minutes, task names) for the rows dated on or after `since`."""
+        import numpy as np
+
+        # julianday('0001-01-01') is 1721425.5 and date(1, 1, 1).toordinal() is 1
+        cursor = self.conn.execute(
+            "SELECT CAST(julianday(log_date) - 1721424.5 AS INTEGER), task, duration FROM time_log WHERE log_date >= ?",
+            ((since or datetime.min.date()).isoformat(),),
+        )
+        rows = cursor.fetchall()
+        add_rows_scanned(len(rows))
+        task_index = {}
+        return (
+            np.fromiter((row[0] for row in rows), dtype=np.int32, count=len(rows)),
+            np.fromiter((task_index.setdefault(row[1], len(task_index)) for row in rows), dtype=np.uint16, count=len(rows)),
+            np.fromiter((row[2] for row in rows), dtype=np.float64, count=len(rows)),
+            list(task_index),
+        )
+
+    def session_columns(self, since=None):
+        """Return (day ordinals, task ids, start minutes, end minutes, task names) like LogStore.session_columns."""
+        import numpy as np
+
+        cursor = self.conn.execute(
+            "SELECT CAST(julianday(log_date) - 1721424.5 AS INTEGER), task, start, end FROM time_log WHERE log_date >= ?",
+            ((since or datetime.min.date()).isoformat(),),
+        )
+        rows = cursor.fetchall()
+        add_rows_scanned(len(rows))
+        task_index = {}
+        return (
+            np.fromiter((row[0] for row in rows), dtype=np.int32, count=len(rows)),
+            np.fromiter((task_index.setdefault(row[1], len(task_index)) for row in rows), dtype=np.uint16, count=len(rows)),
+            np.fromiter((time_to_minutes(row[2] or "") for row in rows), dtype=np.uint16, count=len(rows)),
+            np.fromiter((time_to_minutes(row[3] or "") for row in rows), dtype=np.uint16, count=len(rows)),
+            list(task_index),
+        )
+
+    def task_names(self):
+        """Return the distinct tasks in the log."""
+        return [task for (task,) in self.conn.execute("SELECT DISTINCT task FROM time_log")]
+
+    def history_page(self, start_date, end_date, task=None, cursor=None, page_size=100):
+        """Return (rows, next cursor) for one page of history; the cursor is the (date, id) of the last row shown."""
+        after_date, after_id = cursor or ("", 0)
+        query = ("SELECT id, log_date, task, start, end, duration FROM time_log "
+                 "WHERE log_date BETWEEN ? AND ? AND (log_date, id) > (?, ?)")
+        params = [start_date.isoformat(), end_date.isoformat(), after_date, after_id]
+        if task is not None:
+            query += " AND task = ?"
+            params.append(task)
+        query += " ORDER BY log_date, id LIMIT ?"
+        params.append(page_size)
+        records = self.conn.execute(query, params).fetchall()
+        rows = [(parse_log_date(log_date), task, start, end, duration)
+                for _, log_date, task, start, end, duration in records]
+        next_cursor = (records[-1][1], records[-1][0]) if len(records) == page_size else None
+        return rows, next_cursor
+
+    def row_key_index(self):
+        """Return a RowKeyIndex of every row in the table."""
+        index = RowKeyIndex()
+        for log_date, task, start, end in self.conn.execute("SELECT log_date, task, start, end FROM time_log"):
+            index.add((parse_log_date(log_date), task, start or "", end or ""))
+        return index
+
+    def all_rows(self):
+        """Yield every row as (date, task, start, end, duration), ordered by date."""
+        cursor = self.conn.execute("SELECT log_date, task, start, end, duration FROM time_log ORDER BY log_date, id")
+        for log_date, task, start, end, duration in cursor:
+            yield parse_log_date(log_date), task, start, end, duration
+
+    # -- Mutations -- #
+
+    def append(self, log_date, task, start, end, duration):
+        """Insert one entry."""
+        self.version += 1
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO time_log (log_date, task, start, end, duration) VALUES (?, ?, ?, ?, ?)",
+                (log_date.isoformat(), task, start, end, duration),
+            )
+        advance_rolling_stats(self, log_date, task, duration)
+
+    def append_rows(self, rows):
+        """Insert rows in one transaction (used by the merge import); the table has no order to keep."""
+        self.version += 1
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO time_log (log_date, task, start, end, duration) VALUES (?, ?, ?, ?, ?)",
+                [(row[0].isoformat(),) + tuple(row[1:]) for row in rows],
+            )
+
+    def delete_date(self, day):
+        """Delete every entry logged on the given date."""
+        self.version += 1
+        with self.conn:
+            self.conn.execute("DELETE FROM time_log WHERE log_date = ?", (day.isoformat(),))
+
+    def delete_last(self):
+        """Delete the most recently inserted entry."""
+        self.version += 1
+        with self.conn:
+            self.conn.execute("DELETE FROM time_log WHERE id = (SELECT MAX(id) FROM time_log)")
+
+    def replace_all(self, rows):
+        """Replace the whole log with the given rows (used by the importer)."""
+        self.version += 1
+        with self.conn:
+            self.conn.execute("DELETE FROM time_log")
+            self.conn.executemany(
+                "INSERT INTO time_log (log_date, task, start, end, duration) VALUES (?, ?, ?, ?, ?)",
+                [(row[0].isoformat(),) + tuple(row[1:]) for row in rows],
+            )
+
+    def clear(self):
+        """Delete every entry."""
+        self.version += 1
+        with self.conn:
+            self.conn.execute("DELETE FROM time_log")
+
+    def close(self):
+        self.conn.close()
+
+def migrate_csv_to_sqlite(csv_path, db_path):
+    """One-shot copy of a headerless time log CSV into an SQLite store. Returns (the new SQLiteLogStore, number of rows copied)."""
+    rows = []
+    if os.path.exists(csv_path):
+        with open(csv_path, 'r', newline='') as file:
+            rows = [row for row in map(parse_log_row, csv.reader(file)) if row]
+    store = SQLiteLogStore(db_path)
+    store.replace_all(rows)
+    return store, len(rows)
+
+def export_sqlite_to_csv(store, csv_path):
+    """Write an SQLite store back out in the headerless CSV format. Returns the number of rows written."""
+    rows = list(store.all_rows())
+    write_rows_atomically(csv_path, rows)
+    return len(rows)
+
+def open_log_store(path=None):
+    """Open the SQLite store if the log has been migrated, otherwise the CSV store.
+
+    With a path, opens that log (.db or CSV) read-only instead, as a log the app does not own.
+    """
+    if path is not None:
+        return SQLiteLogStore(path, read_only=True) if path.endswith(".db") else LogStore(path, read_only=True)
+    if os.path.exists(db_file):
+        return SQLiteLogStore(db_file)
+    return LogStore(log_file)
+
+# ------------------------------ Rolling Statistics ------------------------------ #
+
+# Statistics a focus target can use, over the daily minutes of its window (days without time count as 0)
+FOCUS_STATISTICS = ["mean", "median", "p75", "p90", "max"]
+DEFAULT_FOCUS_TARGET = {"window_days": 7, "statistic": "mean", "increment": 10}
+TREND_WINDOWS = {"day": 7, "week": 4, "month": 3, "year": 2}  # Buckets averaged by the chart's trend line
+
+class RollingStats:
+    """Per-task minutes for every day from the first logged day to today, with prefix sums.
+
+    Any window total, and so any rolling mean, is two lookups per task; medians, percentiles
+    and streaks read the same daily matrix. Appends update it in place rather than rebuilding.
+    `tasks` arguments take one task name, a list of them, or None for every task.
+    """
+
+    def __init__(self, first_ordinal, task_names, daily, version=None):
+        import numpy as np
+
+        self.first_ordinal = first_ordinal
+        self.task_index = {task: row for row, task in enumerate(task_names)}
+        self.daily = np.array(daily, dtype=np.float64)  # A (task x day) matrix, copied because add() updates it
+        self.prefix = np.zeros((len(task_names), self.daily.shape[1] + 1))
+        np.cumsum(self.daily, axis=1, out=self.prefix[:, 1:])
+        self.version = version  # Store version these sums reflect
+
+    @classmethod
+    def from_store(cls, store):
+        first_ordinal, task_names, daily = daily_minutes_by_task(store, "all", datetime.now().date())
+        return cls(first_ordinal, task_names, daily, store.version)
+
+    @property
+    def last_ordinal(self):
+        return self.first_ordinal + self.daily.shape[1] - 1
+
+    def add(self, task, day, minutes):
+        """Add minutes logged on a day in range; returns False when the day is outside it (rebuild instead)."""
+        import numpy as np
+
+        offset = day.toordinal() - self.first_ordinal
+        if not 0 <= offset < self.daily.shape[1]:
+            return False
+        if task not in self.task_index:
+            self.task_index[task] = len(self.task_index)
+            self.daily = np.vstack((self.daily, np.zeros(self.daily.shape[1])))
+            self.prefix = np.vstack((self.prefix, np.zeros(self.prefix.shape[1])))
+        row = self.task_index[task]
+        self.daily[row, offset] += minutes
+        self.prefix[row, offset + 1:] += minutes  # Only the last element for today's sessions
+        return True
+
+    def _rows(self, tasks):
+        if tasks is None:
+            return list(self.task_index.values())
+        if isinstance(tasks, str):
+            tasks = [tasks]
+        return [self.task_index[task] for task in tasks if task in self.task_index]
+
+    def _clip(self, end, days):
+        """Offsets [low, high) of the days of the window ending at `end` that lie in range."""
+        high = min(end.toordinal() - self.first_ordinal + 1, self.daily.shape[1])
+        low = max(end.toordinal() - days + 1 - self.first_ordinal, 0)
+        return low, max(high, low)
+
+    def window_total(self, tasks, end, days):
+        """Minutes logged in the `days` days ending at `end` (inclusive), in O(1) per task."""
+        low, high = self._clip(end, days)
+        rows = self._rows(tasks)
+        return float((self.prefix[rows, high] - self.prefix[rows, low]).sum()) if rows else 0.0
+
+    def window_mean(self, tasks, end, days):
+        return self.window_total(tasks, end, days) / days
+
+    def window_values(self, tasks, end, days):
+        """Daily minutes of the window, oldest first; days before the first logged day count as 0."""
+        import numpy as np
+
+        low, high = self._clip(end, days)
+        values = np.zeros(days)
+        rows = self._rows(tasks)
+        if rows and high > low:
+            values[days - (high - low):] = self.daily[rows, low:high].sum(axis=0)
+        return values
+
+    def window_statistic(self, tasks, end, days, statistic="mean"):
+        """mean, median, max or a percentile such as 'p90' of the daily minutes over a window."""
+        import numpy as np
+
+        if statistic == "mean":
+            return self.window_mean(tasks, end, days)
+        values = self.window_values(tasks, end, days)
+        if statistic == "median":
+            return float(np.median(values))
+        if statistic == "max":
+            return float(values.max())
+        if statistic.startswith("p"):
+            return float(np.percentile(values, float(statistic[1:])))
+        raise ValueError(f"Unknown statistic: {statistic}")
+
+    def streak(self, tasks, end, min_minutes=1):
+        """Number of consecutive days ending at `end` with at least `min_minutes` logged."""
+        import numpy as np
+
+        low, high = self._clip(end, end.toordinal() - self.first_ordinal + 1)
+        rows = self._rows(tasks)
+        if not rows or high <= low:
+            return 0
+        short_days = np.flatnonzero(self.daily[rows, low:high].sum(axis=0) < min_minutes)
+        return high - low - (int(short_days[-1]) + 1 if len(short_days) else 0)
+
+    def rolling_mean(self, tasks, days):
+        """Trailing `days`-day mean for every day in range, as one vectorized difference of prefix sums."""
+        import numpy as np
+
+        rows = self._rows(tasks)
+        prefix = self.prefix[rows].sum(axis=0) if rows else np.zeros(self.prefix.shape[1])
+        ends = np.arange(1, len(prefix))
+        return (prefix[ends] - prefix[np.maximum(ends - days, 0)]) / days
+
+    def bucket_trend(self, tasks, dates, group):
+        """Trailing mean of the last TREND_WINDOWS[group] bucket totals, for each bucket start in `dates` (most recent first)."""
+        window = TREND_WINDOWS[group]
+        trend = []
+        for index, start in enumerate(dates):
+            end = dates[index - 1] - timedelta(days=1) if index else datetime.fromordinal(self.last_ordinal).date()
+            first = shift_bucket_start(start, group, window - 1)
+            trend.append(self.window_total(tasks, end, (end - first).days + 1) / window)
+        return trend
+
+def shift_bucket_start(day, group, count):
+    """Move a bucket start date `count` buckets back."""
+    if group == "day":
+        return day - timedelta(days=count)
+    if group == "week":
+        return day - timedelta(weeks=count)
+    if group == "month":
+        months = day.year * 12 + day.month - 1 - count
+        return day.replace(year=months // 12, month=months % 12 + 1, day=1)
+    return day.replace(year=day.year - count, month=1, day=1)
+
+def get_rolling_stats(store):
+    """Return the store's RollingStats, rebuilding it only after changes other than appends or when the day rolls over."""
+    store.sync()  # Another instance may have logged time meanwhile
+    stats = store.rolling_stats
+    if stats is None or stats.version != store.version or stats.last_ordinal != datetime.now().date().toordinal():
+        stats = store.rolling_stats = RollingStats.from_store(store)
+    return stats
+
+def advance_rolling_stats(store, log_date, task, duration):
+    """Fold an appended entry into the store's RollingStats (the store has already bumped its version)."""
+    stats = store.rolling_stats
+    if stats is not None and stats.version == store.version - 1 and stats.add(task, log_date, compact_duration(duration)):
+        stats.version = store.version
+
+def load_focus_target(path=None):
+    """Return the saved focus target formula, filled in with the defaults."""
+    try:
+        with open(path or settings_file, 'r') as file:
+            saved = json.load(file).get("focus_target", {})
+    except (OSError, ValueError, AttributeError):
+        saved = {}
+    target = dict(DEFAULT_FOCUS_TARGET)
+    target.update({key: saved[key] for key in target if key in saved})
+    if target["statistic"] not in FOCUS_STATISTICS:
+        target["statistic"] = DEFAULT_FOCUS_TARGET["statistic"]
+    return target
+
+def save_focus_target(target, path=None):
+    """Save the focus target formula, keeping any other settings in the file."""
+    path = path or settings_file
+    try:
+        with open(path, 'r') as file:
+            settings = json.load(file)
+    except (OSError, ValueError):
+        settings = {}
+    settings["focus_target"] = dict(target)
+    with open(path, 'w') as file:
+        json.dump(settings, file, indent=2)
+
+# ------------------------------ Task Categories ------------------------------ #
+
+DEFAULT_TASK_CATEGORIES = ["Main", "Secondary"]
+
+def load_task_categories(path=None):
+    """Return the saved task categories, or the defaults when none were saved yet."""
+    try:
+        with open(path or categories_file, 'r') as file:
+            categories = json.load(file)
+    except (OSError, ValueError):
+        return list(DEFAULT_TASK_CATEGORIES)
+    return [str(category) for category in categories if str(category).strip()] or list(DEFAULT_TASK_CATEGORIES)
+
+def save_task_categories(categories, path=None):
+    with open(path or categories_file, 'w') as file:
+        json.dump(list(categories), file, indent=2)
+
+def merge_task_categories(categories, logged_tasks):
+    """Append tasks found in the log that are not categories yet, keeping the user's order first."""
+    return list(dict.fromkeys(list(categories) + [task for task in logged_tasks if task.strip()]))
+
+# ------------------------------ Logging Functions ------------------------------ #
+
+@instrumented("log_task")
+def log_task(store, task, start_time, end_time):
+    """Log task details into the store."""
+    duration = round((end_time - start_time).total_seconds() / 60)
+    store.append(datetime.now().date(), task, start_time.strftime("%H:%M"), end_time.strftime("%H:%M"), duration)
+
+def calculate_average_filling_time(store, task, target=None):
+    """Calculate the focus target (filling time) for a task.
+
+    By default this is the mean of the last 7 days plus 10 minutes; `target` can change the
+    window, the statistic and the increment (see load_focus_target).
+    """
+    target = target or DEFAULT_FOCUS_TARGET
+    today = datetime.now().date()
+    store.sync()
+    stats = store.rolling_stats
+    if stats is None or stats.version != store.version or stats.last_ordinal != today.toordinal():
+        # Only the window is needed, so read just its tail instead of building the all-time stats
+        stats = RollingStats(*daily_minutes_by_task(store, f"{target['window_days']}days", today))
+    value = stats.window_statistic(task, today, target["window_days"], target["statistic"])
+    return value + target["increment"]
+
+# ------------------------------ Streaming Import Pipeline ------------------------------ #
+
+class ImportCancelled(Exception):
+    """Raised inside the import worker when the user presses Cancel."""
+
+def normalize_import_chunk(chunk):
+    """Clean one DataFrame chunk of imported rows and return them as parsed log rows sorted by date."""
+    import pandas as pd
+
+    chunk = chunk.dropna(subset=[0]).copy()
+    chunk[0] = pd.to_datetime(chunk[0], errors='coerce')
+    chunk = chunk.dropna(subset=[0])
+    chunk[0] = chunk[0].dt.strftime("%Y-%m-%d")
+    for column in (2, 3):
+        if column in chunk:
+            chunk[column] = chunk[column].astype(str).str.extract(r'(\d{2}:\d{2})')[0]
+    records = chunk.iloc[:, :5].fillna('').astype(str).values.tolist()
+    rows = [row for row in map(parse_log_row, records) if row]
+    rows.sort(key=lambda row: row[0])
+    return rows
+
+def iter_import_chunks(excel_data, csv_path):
+    """Yield DataFrame chunks of the Excel data and then, read lazily in chunks, of the optional CSV file."""
+    import pandas as pd
+
+    for begin in range(0, len(excel_data), import_chunk_rows):
+        yield excel_data.iloc[begin:begin + import_chunk_rows]
+    if csv_path and os.path.getsize(csv_path) > 0:
+        yield from pd.read_csv(csv_path, header=None, chunksize=import_chunk_rows)
+
+def count_lines(path):
+    """Count the lines of a file by scanning it in binary blocks."""
+    count = 0
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            count += block.count(b'\n')
+    return count
+
+def iter_sorted_run(path):
+    """Yield the parsed rows of one sorted run file."""
+    with open(path, 'r', newline='') as file:
+        for row in csv.reader(file):
+            parsed = parse_log_row(row)
+            if parsed:
+                yield parsed
+
+def import_pipeline(excel_path, csv_path, write_rows, progress, cancelled):
+    """Merge the old Excel (and optional CSV) file into a date-sorted log without holding it all in memory.
+
+    Each chunk is normalized, sorted and spilled to a temporary run file; the runs are then
+    merged by date and streamed into `write_rows`. `progress(message, fraction)` is called from
+    the worker thread and `cancelled()` is polled between chunks. Returns the number of rows written.
+    """
+    import pandas as pd
+
+    progress("Reading the Excel file...", 0.0)
+    # Excel workbooks cannot be read in chunks; headless callers may import a CSV file alone
+    excel_data = pd.read_excel(excel_path, header=None) if excel_path else pd.DataFrame()
+    total = len(excel_data) + (count_lines(csv_path) if csv_path else 0)
+    read = 0
+    with tempfile.TemporaryDirectory(prefix="time_log_import_") as run_dir:
+        runs = []
+        for chunk in iter_import_chunks(excel_data, csv_path):
+            if cancelled():
+                raise ImportCancelled()
+            rows = normalize_import_chunk(chunk)
+            run_path = os.path.join(run_dir, f"run_{len(runs)}.csv")
+            with open(run_path, 'w', newline='') as file:
+                csv.writer(file).writerows(rows)
+            runs.append(run_path)
+            read += len(chunk)
+            progress(f"Sorted {read} of ~{total} rows", 0.5 * read / max(total, 1))
+
+        written = 0
+        def merged_rows():
+            nonlocal written
+            merged = heapq.merge(*(iter_sorted_run(path) for path in runs), key=lambda row: row[0])
+            for written, row in enumerate(merged, 1):
+                if written % 10000 == 0:
+                    if cancelled():
+                        raise ImportCancelled()
+                    progress(f"Merged {written} of ~{read} rows", 0.5 + 0.5 * written / max(read, 1))
+                yield row
+
+        write_rows(merged_rows())
+    progress(f"Imported {written} rows", 1.0)
+    return written
+
+# ------------------------------ Merge Import ------------------------------ #
+
+def pack_row_keys(ordinals, task_codes, starts, ends):
+    """Pack (day ordinal, task code, start, end minutes) into one int64 key per row (NumPy arrays in and out).
+
+    Task codes from 2048 on no longer fit in an int64 once shifted; those keys are built as Python ints.
+    """
+    import numpy as np
+
+    dtype = np.int64 if not len(task_codes) or int(task_codes.max()) < 1 << 11 else object
+    return ((task_codes.astype(dtype) << 52) | (ordinals.astype(dtype) << 32)
+            | (starts.astype(dtype) << 16) | ends.astype(dtype))
+
+class RowKeyIndex:
+    """Hash index over the (date, task, start, end) of logged rows, for skipping rows already in the log.
+
+    Each row is a single packed int in a set, with tasks numbered through `task_codes`, so the
+    index of a million-row log costs one int per row instead of a tuple of four objects.
+    """
+
+    def __init__(self, task_codes=None, keys=None, last_ordinal=0):
+        self.task_codes = task_codes or {}  # task -> code packed into the key
+        self.keys = keys if keys is not None else set()
+        self.last_ordinal = last_ordinal  # Latest date in the index, as an ordinal
+
+    def add(self, row):
+        """Index a (date, task, start, end, ...) row; returns False when it was already present."""
+        code = self.task_codes.setdefault(row[1], len(self.task_codes))
+        ordinal = row[0].toordinal()
+        key = (code << 52) | (ordinal << 32) | (time_to_minutes(row[2]) << 16) | time_to_minutes(row[3])
+        if key in self.keys:
+            return False
+        self.keys.add(key)
+        self.last_ordinal = max(self.last_ordinal, ordinal)
+        return True
+
+def merge_rows_into_store(store, rows, progress=lambda message, fraction: None):
+    """Add the rows (sorted by date) that are not in the log yet; duplicates, also within `rows`, are skipped.
+
+    Costs one hash lookup per row. The new rows are appended in date order, and the log is only
+    rewritten when some of them are older than its last date. Returns (added, skipped).
+    """
+    index = store.row_key_index()
+    new_rows = []
+    skipped = 0
+    for row in rows:
+        if index.add(row):
+            new_rows.append(row)
+        else:
+            skipped += 1
+    progress(f"Adding {len(new_rows)} new rows ({skipped} already logged)", 1.0)
+    new_rows.sort(key=lambda row: row[0])  # Already in order from import_pipeline; stable otherwise
+    store.append_rows(new_rows)
+    return len(new_rows), skipped
+
+def merge_import(store, excel_path, csv_path, progress, cancelled):
+    """import_pipeline in merge mode: keep the log and add only the imported rows it does not have.
+
+    Re-running the same import adds nothing and leaves the file untouched. Returns (added, skipped).
+    """
+    counts = []
+    import_pipeline(excel_path, csv_path, lambda rows: counts.append(merge_rows_into_store(store, rows)),
+                    progress, cancelled)
+    return counts[0]
+
+# ------------------------------ Analytics Functions ------------------------------ #
+
+# Periods offered in the Analysis tab: 'Ndays' for any N, or 'all' for the whole history
+PERIOD_CHOICES = [("7days", "Last 7 Days"), ("14days", "Last 14 Days"), ("30days", "Last 30 Days"),
+                  ("90days", "Last 90 Days"), ("365days", "Last 365 Days"), ("all", "All Time")]
+GROUP_CHOICES = [("day", "Daily"), ("week", "Weekly"), ("month", "Monthly"), ("year", "Yearly")]
+GROUP_LABEL_FORMATS = {"day": "%d-%b", "week": "%d-%b", "month": "%b-%y", "year": "%Y"}
+
+def period_start_date(period, today):
+    """Return the first date covered by a period key, or None for 'all'."""
+    if period == "all":
+        return None
+    return today - timedelta(days=int(period[:-len("days")]) - 1)
+
+def group_boundaries(first_ordinal, day_count, group):
+    """Return the offsets (from first_ordinal) where each day/week/month/year bucket starts."""
+    import numpy as np
+
+    ordinals = np.arange(first_ordinal, first_ordinal + day_count)
+    if group == "day":
+        return ordinals - first_ordinal
+    days = (ordinals - 719163).astype("datetime64[D]")  # 719163 is date(1970, 1, 1).toordinal()
+    if group == "week":
+        starts = (ordinals % 7) == 1  # Ordinal 1 (0001-01-01) was a Monday
+    elif group == "month":
+        starts = days.astype("datetime64[M]").astype("datetime64[D]") == days
+    else:
+        starts = days.astype("datetime64[Y]").astype("datetime64[D]") == days
+    starts[0] = True
+    return np.flatnonzero(starts)
+
+def daily_minutes_by_task(store, period, today):
+    """Return (first day ordinal, task names, NumPy matrix of minutes per task (rows) and day up to today).
+
+    Every task is summed in the same single bincount over (task id, day offset) keys.
+    """
+    import numpy as np
+
+    start = period_start_date(period, today)
+    ordinals, task_ids, minutes, task_names = store.columns(start)
+
+    if start is None:  # All time: start from the first logged day
+        start = datetime.fromordinal(int(ordinals.min())).date() if len(ordinals) else today
+    first_ordinal = start.toordinal()
+    day_count = today.toordinal() - first_ordinal + 1
+
+    offsets = ordinals - first_ordinal
+    selected = (offsets >= 0) & (offsets < day_count)
+    keys = task_ids[selected].astype(np.int64) * day_count + offsets[selected]
+    daily = np.bincount(keys, weights=minutes[selected], minlength=len(task_names) * day_count)
+    return first_ordinal, task_names, daily.reshape(len(task_names), day_count)
+
+def daily_task_minutes(store, period, task_type_chart, today):
+    """Return (first day ordinal, NumPy array of minutes per day up to today) for one task over a period."""
+    import numpy as np
+
+    first_ordinal, task_names, daily = daily_minutes_by_task(store, period, today)
+    if task_type_chart not in task_names:
+        return first_ordinal, np.zeros(daily.shape[1])
+    return first_ordinal, daily[task_names.index(task_type_chart)]
+
+def bucket_daily_minutes(first_ordinal, daily, group):
+    """Fold per-day minutes into day/week/month/year buckets; returns (bucket start dates, totals), most recent first.
+
+    `daily` may also be a task-by-day matrix, which gives one list of totals per task.
+    """
+    import numpy as np
+
+    boundaries = group_boundaries(first_ordinal, daily.shape[-1], group)
+    totals = np.add.reduceat(daily, boundaries, axis=-1)
+    dates = [datetime.fromordinal(first_ordinal + int(offset)).date() for offset in boundaries]
+    return dates[::-1], totals[..., ::-1].tolist()
+
+@instrumented("calculate_task_totals")
+def calculate_task_totals(store, period, task_type_chart, group="day"):
+    """Calculate total durations for the selected task over the specified period, bucketed by day, week, month or year.
+
+    Returns the first date of each bucket (most recent first, like the daily chart) and the minutes logged in it.
+    """
+    first_ordinal, daily = daily_task_minutes(store, period, task_type_chart, datetime.now().date())
+    return bucket_daily_minutes(first_ordinal, daily, group)
+
+@instrumented("calculate_all_task_totals")
+def calculate_all_task_totals(store, period, group="day"):
+    """Calculate the totals of every task at once, bucketed like calculate_task_totals.
+
+    Returns (bucket dates, {task: totals}), largest task first; tasks with no time in the period are left out.
+    """
+    first_ordinal, task_names, daily = daily_minutes_by_task(store, period, datetime.now().date())
+    dates, totals = bucket_daily_minutes(first_ordinal, daily, group)
+    series = {task: task_totals for task, task_totals in zip(task_names, totals) if any(task_totals)}
+    return dates, dict(sorted(series.items(), key=lambda item: -sum(item[1])))
+
+def fit_group(first_ordinal, day_count, group, max_buckets):
+    """Return `group`, or the first coarser bucket size that gives at most `max_buckets` bars (year at the coarsest)."""
+    sizes = [size for size, _ in GROUP_CHOICES]
+    for candidate in sizes[sizes.index(group):]:
+        if len(group_boundaries(first_ordinal, day_count, candidate)) <= max_buckets:
+            return candidate
+    return sizes[-1]
+
+@instrumented("calculate_chart_series")
+def calculate_chart_series(store, period, task_type_chart=None, group="day", max_buckets=None):
+    """Bucket one task (or every task, when None) for a bar chart of at most `max_buckets` bars.
+
+    Long ranges are downsampled to weekly, monthly or yearly buckets as needed. Returns
+    (group used, bucket dates most recent first, {task: totals}) like calculate_all_task_totals.
+    """
+    first_ordinal, task_names, daily = daily_minutes_by_task(store, period, datetime.now().date())
+    return chart_series_from_daily(first_ordinal, task_names, daily, task_type_chart, group, max_buckets)
+
+def chart_series_from_daily(first_ordinal, task_names, daily, task_type_chart=None, group="day", max_buckets=None):
+    """calculate_chart_series on an already aggregated task-by-day matrix (see daily_minutes_by_task)."""
+    if max_buckets:
+        group = fit_group(first_ordinal, daily.shape[1], group, max_buckets)
+    if task_type_chart is not None:
+        daily = daily[[task_names.index(task_type_chart)]] if task_type_chart in task_names else daily[:0].sum(axis=0, keepdims=True)
+    dates, totals = bucket_daily_minutes(first_ordinal, daily, group)
+    if task_type_chart is not None:
+        return group, dates, {task_type_chart: totals[0]}
+    series = {task: task_totals for task, task_totals in zip(task_names, totals) if any(task_totals)}
+    return group, dates, dict(sorted(series.items(), key=lambda item: -sum(item[1])))
+
+def slice_daily_period(first_ordinal, daily, period, today):
+    """Cut a task-by-day matrix ending today down to a period, padding days before the first one with zeros.
+
+    Returns (first day ordinal, matrix) as daily_minutes_by_task would for that period, so one
+    all-time aggregation can serve every period.
+    """
+    import numpy as np
+
+    start = period_start_date(period, today)
+    if start is None:
+        return first_ordinal, daily
+    offset = start.toordinal() - first_ordinal
+    if offset >= 0:
+        return start.toordinal(), daily[:, offset:]
+    return start.toordinal(), np.concatenate((np.zeros((daily.shape[0], -offset)), daily), axis=1)
+
+@instrumented("calculate_calendar_grid")
+def calculate_calendar_grid(store, period, task_type_chart=None):
+    """Lay out the daily minutes of one task (or all tasks, when None) as a weekday-by-week grid for a calendar heatmap.
+
+    Returns (Monday of the first column, 7 x weeks NumPy array); days outside the period are NaN.
+    """
+    import numpy as np
+
+    first_ordinal, task_names, daily = daily_minutes_by_task(store, period, datetime.now().date())
+    if task_type_chart is None:
+        minutes = daily.sum(axis=0)
+    elif task_type_chart in task_names:
+        minutes = daily[task_names.index(task_type_chart)]
+    else:
+        minutes = np.zeros(daily.shape[1])
+
+    lead = (first_ordinal - 1) % 7  # Days from the Monday of the first week (ordinal 1 was a Monday)
+    weeks = -(-(lead + len(minutes)) // 7)
+    cells = np.full(weeks * 7, np.nan)
+    cells[lead:lead + len(minutes)] = minutes
+    first_monday = datetime.fromordinal(first_ordinal - lead).date()
+    return first_monday, cells.reshape(weeks, 7).T
+
+DAY_MINUTES = 24 * 60
+WEEK_MINUTES = 7 * DAY_MINUTES
+
+@instrumented("calculate_focus_heatmap")
+def focus_minutes_by_task(store, period, bin_minutes=60):
+    """Return (task names, NumPy array tasks x 7 weekdays x time bins) of the minutes spent in each bin.
+
+    Every session is spread over the bins its start-end interval overlaps, minute-exactly, in one
+    vectorized pass: +1/-1 at each session's start and end minute of the week go into a
+    difference array (one bincount per sign), whose running sum is the number of sessions active
+    in every minute. Rows are dated when the session ended (see log_task), so an end before the
+    start means the session crossed midnight and began the day before; sessions running past
+    Sunday midnight wrap around to Monday. `bin_minutes` must divide a day (60 gives 7 x 24, 15 gives 7 x 96).
+    """
+    import numpy as np
+
+    if DAY_MINUTES % bin_minutes:
+        raise ValueError(f"bin_minutes must divide {DAY_MINUTES}")
+    ordinals, task_ids, starts, ends, task_names = store.session_columns(period_start_date(period, datetime.now().date()))
+    timed = (starts != NO_TIME) & (ends != NO_TIME)
+    ordinals = ordinals[timed].astype(np.int64)
+    starts = starts[timed].astype(np.int64)
+    ends = ends[timed].astype(np.int64)
+
+    crossed = ends < starts
+    lengths = ends - starts + crossed * DAY_MINUTES
+    weekdays = (ordinals - 1 - crossed) % 7  # Ordinal 1 (0001-01-01) was a Monday
+    begins = weekdays * DAY_MINUTES + starts  # Minute of the week, Monday 00:00 being 0
+
+    # Two weeks per task, so a session never runs past the end of its task's slice
+    span = 2 * WEEK_MINUTES
+    offsets = task_ids[timed].astype(np.int64) * span
+    size = len(task_names) * span
+    diff = np.bincount(offsets + begins, minlength=size) - np.bincount(offsets + begins + lengths, minlength=size)
+    active = np.cumsum(diff.reshape(len(task_names), span), axis=1)
+    week = active[:, :WEEK_MINUTES] + active[:, WEEK_MINUTES:]  # Fold the overflow past Sunday back onto Monday
+    add_rows_scanned(len(starts))
+    return task_names, week.reshape(len(task_names), 7, DAY_MINUTES // bin_minutes, bin_minutes).sum(axis=3)
+
+def calculate_focus_heatmap(store, period, task_type_chart=None, bin_minutes=60):
+    """Return a 7 x (day / bin_minutes) NumPy array of the minutes one task (or every task, when None) was logged in each weekday and time bin."""
+    import numpy as np
+
+    task_names, minutes = focus_minutes_by_task(store, period, bin_minutes)
+    if task_type_chart is None:
+        return minutes.sum(axis=0) if len(task_names) else np.zeros((7, DAY_MINUTES // bin_minutes))
+    if task_type_chart not in task_names:
+        return np.zeros((7, DAY_MINUTES // bin_minutes))
+    return minutes[task_names.index(task_type_chart)]
+
+# ------------------------------ Team Aggregation ------------------------------ #
+
+def team_log_paths(directory):
+    """Return {person: path} for every CSV log in a directory, named after the file (alice.csv -> alice)."""
+    paths = {}
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if name.lower().endswith(".csv") and os.path.isfile(path):
+            paths[os.path.splitext(name)[0]] = path
+    return paths
+
+def person_daily_minutes(path, period, task_type_chart, today):
+    """Process pool job: load one person's log and return its per-day minutes (see daily_task_minutes)."""
+    return daily_task_minutes(LogStore(path, read_only=True), period, task_type_chart, today)
+
+def calculate_team_totals(directory, period, task_type_chart, group="day", max_workers=None):
+    """Aggregate every log in a directory in parallel, one process per core.
+
+    Returns ({person: (dates, totals)}, (dates, totals) for the whole team), with the same
+    bucketing as calculate_task_totals. For 'all', the team series starts at the earliest log.
+    """
+    import multiprocessing
+    import numpy as np
+    from concurrent.futures import ProcessPoolExecutor
+
+    paths = team_log_paths(directory)
+    today = datetime.now().date()  # Fixed once, so every worker buckets against the same day
+    people = list(paths)
+    if not people:
+        return {}, ([], [])
+
+    # Spawn is safe from the app's worker thread and on every platform. Each worker re-runs the parent's
+    # __main__ script as __mp_main__, so scripts keep their startup side effects under `if __name__ == "__main__"`
+    context = multiprocessing.get_context("spawn")
+    workers = min(len(people), max_workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        dailies = list(pool.map(person_daily_minutes, paths.values(), [period] * len(people),
+                                [task_type_chart] * len(people), [today] * len(people)))
+
+    per_person = {person: bucket_daily_minutes(first_ordinal, daily, group)
+                  for person, (first_ordinal, daily) in zip(people, dailies)}
+
+    # Every daily series ends today, so they line up from the right; pad the shorter ones at the start
+    team_first = min(first_ordinal for first_ordinal, _ in dailies)
+    team_daily = np.zeros(today.toordinal() - team_first + 1)
+    for first_ordinal, daily in dailies:
+        team_daily[first_ordinal - team_first:] += daily
+    return per_person, bucket_daily_minutes(team_first, team_daily, group)